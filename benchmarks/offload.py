@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""CPU処理のオフロード効果のベンチマーク
+
+小さなリクエスト（数KBのJSON）を一定間隔で処理しながら、大きな
+リクエスト（数MBのJSON）を並行して処理し、小さなリクエストの
+レイテンシ（p50/p99）を実行モードごとに比較する。
+
+    python benchmarks/offload.py --duration 5 --large-mb 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from egov_mcp.executor import EXECUTOR_MODES, CpuExecutor
+from egov_mcp.main import render_json
+
+
+def make_payload(count: int) -> bytes:
+    """法令一覧取得APIに似た形のJSONを生成する"""
+    law = {
+        "law_info": {
+            "law_type": "Act",
+            "law_id": "411AC0000000127",
+            "law_num": "平成十一年法律第百二十七号",
+            "promulgation_date": "1999-08-13",
+        },
+        "revision_info": {
+            "law_title": "国旗及び国歌に関する法律",
+            "category": "文化",
+            "current_revision_status": "CurrentEnforced",
+        },
+    }
+    data = {"total_count": count, "count": count, "laws": [law] * count}
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def percentile(samples: List[float], ratio: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def run_mode(
+    executor: CpuExecutor,
+    small: bytes,
+    large: bytes,
+    duration: float,
+    small_interval: float,
+    large_interval: float,
+) -> Dict[str, float]:
+    """実行モード1つ分の計測を行い、小さなリクエストの統計を返す"""
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def small_request(issued: float) -> None:
+        # イベントループの空き待ちも含めて、発行時刻から計測する
+        await executor.run(len(small), render_json, small, "")
+        latencies.append((time.perf_counter() - issued) * 1000)
+
+    async def large_request() -> None:
+        await executor.run(len(large), render_json, large, "")
+
+    tasks = []
+    next_large = time.perf_counter()
+    next_small = next_large
+    while time.perf_counter() < deadline:
+        now = time.perf_counter()
+        if now >= next_large:
+            tasks.append(asyncio.ensure_future(large_request()))
+            next_large = now + large_interval
+        # ループが止まっていた間に予定されていたリクエストも発行時刻どおりに扱う
+        while next_small <= now:
+            tasks.append(asyncio.ensure_future(small_request(next_small)))
+            next_small += small_interval
+        await asyncio.sleep(max(0.0, next_small - time.perf_counter()))
+    await asyncio.gather(*tasks)
+
+    return {
+        "count": len(latencies),
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--large-mb", type=float, default=5.0)
+    parser.add_argument("--small-interval-ms", type=float, default=10.0)
+    parser.add_argument("--large-interval-ms", type=float, default=500.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--modes", default=",".join(EXECUTOR_MODES),
+        help="比較する実行モード（カンマ区切り）",
+    )
+    args = parser.parse_args()
+
+    small = make_payload(10)
+    per_law = len(make_payload(1))
+    large = make_payload(int(args.large_mb * 1024 * 1024 / per_law))
+    print(f"small={len(small)}B large={len(large) / 1024 / 1024:.1f}MB")
+
+    results = {}
+    for mode in args.modes.split(","):
+        executor = CpuExecutor(mode=mode, workers=args.workers)
+        try:
+            results[mode] = asyncio.run(run_mode(
+                executor, small, large, args.duration,
+                args.small_interval_ms / 1000, args.large_interval_ms / 1000,
+            ))
+        finally:
+            executor.shutdown()
+        stats = results[mode]
+        print(
+            f"{mode:>8}: small requests={stats['count']} "
+            f"p50={stats['p50']:.2f}ms p99={stats['p99']:.2f}ms "
+            f"max={stats['max']:.2f}ms"
+        )
+
+    if "inline" in results:
+        baseline = results["inline"]["p99"]
+        for mode, stats in results.items():
+            if mode != "inline":
+                print(
+                    f"{mode}: p99 {baseline:.2f}ms -> {stats['p99']:.2f}ms "
+                    f"({baseline / stats['p99']:.1f}x)"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
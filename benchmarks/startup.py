@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""起動時間ベンチマーク
+
+MCPサーバーをstdioモードで起動し、プロセス生成から tools/list の
+応答を受け取るまでの時間を計測する。中央値が目標値（または基準値から
+許容幅を超えて）を上回った場合は終了コード1を返す。
+
+    python benchmarks/startup.py --runs 10 --target-ms 1500
+    python benchmarks/startup.py --baseline benchmarks/startup_baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROTOCOL_VERSION = "2024-11-05"
+
+
+def send(proc: subprocess.Popen, message: Dict[str, Any]) -> None:
+    proc.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+    proc.stdin.flush()
+
+
+def receive(proc: subprocess.Popen, request_id: int) -> Dict[str, Any]:
+    """指定したIDの応答を受け取るまで読み進める"""
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError("サーバーが応答前に終了しました")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def measure_once(timeout: float) -> float:
+    """1回分の起動から tools/list 応答までの時間（ミリ秒）を返す"""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "egov_mcp.main"],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    try:
+        send(proc, {
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "startup-bench", "version": "1.0"},
+            },
+        })
+        receive(proc, 1)
+        send(proc, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send(proc, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        response = receive(proc, 2)
+        elapsed = (time.perf_counter() - started) * 1000
+        if "result" not in response:
+            raise RuntimeError(f"tools/list が失敗しました: {response}")
+        return elapsed
+    finally:
+        timer.cancel()
+        proc.stdin.close()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1500.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--baseline", help="基準値を保存したJSONファイル（回帰チェック用）"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="基準値に対する許容増加率（デフォルト: 0.2）",
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true",
+        help="計測結果で基準値ファイルを更新する",
+    )
+    args = parser.parse_args()
+
+    # 初回はバイトコードのコンパイルを含むため計測から除外する
+    measure_once(args.timeout)
+    samples = [measure_once(args.timeout) for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(
+        f"time-to-first-list_tools: median={median:.1f}ms "
+        f"min={min(samples):.1f}ms max={max(samples):.1f}ms "
+        f"(runs={args.runs}, target={args.target_ms:.0f}ms)"
+    )
+
+    failed = False
+    if median > args.target_ms:
+        print(f"NG: 目標値 {args.target_ms:.0f}ms を超えています")
+        failed = True
+
+    if args.baseline:
+        if args.update_baseline:
+            with open(args.baseline, "w", encoding="utf-8") as f:
+                json.dump({"median_ms": round(median, 1)}, f)
+            print(f"基準値を更新しました: {args.baseline}")
+        elif os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)["median_ms"]
+            limit = baseline * (1 + args.tolerance)
+            if median > limit:
+                print(
+                    f"NG: 基準値 {baseline:.1f}ms から回帰しています"
+                    f"（許容上限 {limit:.1f}ms）"
+                )
+                failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
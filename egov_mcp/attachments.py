@@ -0,0 +1,159 @@
+# 添付ファイルのローカル保存
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+
+class StoredAttachment:
+    """保存済みの添付ファイル"""
+
+    __slots__ = ("law_revision_id", "src", "updated", "content_type", "size", "path")
+
+    def __init__(
+        self, law_revision_id: str, src: str, updated: str,
+        content_type: str, size: int, path: str,
+    ):
+        self.law_revision_id = law_revision_id
+        self.src = src
+        self.updated = updated
+        self.content_type = content_type
+        self.size = size
+        self.path = path
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class AttachmentStore:
+    """添付ファイルを 法令履歴ID・パス・更新日時 ごとに1回だけ保存するディレクトリ
+
+    本体は <ハッシュ>.bin、コンテンツタイプなどは <ハッシュ>.json に書き出し、
+    法令履歴ID・パスごとに最後に保存した更新日時を <ハッシュ>.latest に記録する
+    （別プロセスからも更新日時を指定せずに参照できる）。更新日時が変わった
+    添付ファイルは古いものを削除して保存し直す。本体の合計サイズが max_bytes を
+    超えると、最後に参照された時刻の古いものから削除する。
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # (法令履歴ID, パス) → 最後に保存・参照したもの
+        self._latest: Dict[Tuple[str, str], StoredAttachment] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, law_revision_id: str, src: str, updated: str
+    ) -> Optional[StoredAttachment]:
+        """保存済みであれば返す（以前のプロセスで保存したものも含む）"""
+        path = self._path(law_revision_id, src, updated)
+        try:
+            with open(path + ".json", encoding="utf-8") as f:
+                info = json.load(f)
+            # 参照時刻を更新し、容量超過時に削除されにくくする
+            os.utime(path + ".bin")
+        except (OSError, ValueError):
+            return None
+        stored = StoredAttachment(
+            law_revision_id, src, updated,
+            info.get("content_type", ""), info.get("size", 0), path + ".bin",
+        )
+        self._latest[(law_revision_id, src)] = stored
+        return stored
+
+    def lookup(self, law_revision_id: str, src: str) -> Optional[StoredAttachment]:
+        """更新日時を指定せずに、最後に保存したものを返す"""
+        stored = self._latest.get((law_revision_id, src))
+        if stored is not None and os.path.exists(stored.path):
+            return stored
+        try:
+            with open(self._latest_path(law_revision_id, src), encoding="utf-8") as f:
+                updated = json.load(f)["updated"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return self.get(law_revision_id, src, updated)
+
+    def save(
+        self, law_revision_id: str, src: str, updated: str,
+        content_type: str, content: bytes,
+    ) -> StoredAttachment:
+        """添付ファイルを書き出す（本体を書き終えてから情報ファイルを置く）"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(law_revision_id, src, updated)
+        _write_atomic(path + ".bin", content)
+        info = {
+            "law_revision_id": law_revision_id,
+            "src": src,
+            "updated": updated,
+            "content_type": content_type,
+            "size": len(content),
+        }
+        _write_atomic(
+            path + ".json", json.dumps(info, ensure_ascii=False).encode("utf-8")
+        )
+        stored = StoredAttachment(
+            law_revision_id, src, updated, content_type, len(content),
+            path + ".bin",
+        )
+        with self._lock:
+            previous = self.lookup(law_revision_id, src)
+            _write_atomic(
+                self._latest_path(law_revision_id, src),
+                json.dumps({"updated": updated}).encode("utf-8"),
+            )
+            self._latest[(law_revision_id, src)] = stored
+            if previous is not None and previous.path != stored.path:
+                _remove(previous.path[:-len(".bin")])
+            self._evict(keep=stored.path)
+        return stored
+
+    def _evict(self, keep: str) -> None:
+        """本体の合計サイズが上限を超えていれば古いものから削除する（keep は残す）"""
+        files = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".bin"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            _remove(path[:-len(".bin")])
+            total -= size
+
+    def _path(self, law_revision_id: str, src: str, updated: str) -> str:
+        return os.path.join(self.directory, _digest(law_revision_id, src, updated))
+
+    def _latest_path(self, law_revision_id: str, src: str) -> str:
+        return os.path.join(
+            self.directory, _digest(law_revision_id, src) + ".latest"
+        )
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def _remove(base_path: str) -> None:
+    """本体と情報ファイルを削除する（情報ファイルを先に消して参照できなくする）"""
+    for suffix in (".json", ".bin"):
+        try:
+            os.remove(base_path + suffix)
+        except OSError:
+            pass
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    os.replace(temp_path, path)
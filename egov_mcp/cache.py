@@ -0,0 +1,260 @@
+# 上流APIレスポンスのキャッシュとバックグラウンド再検証
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from typing import (
+    Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple,
+)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class SingleFlight:
+    """同一キーの同時実行を1回にまとめる
+
+    待機者の一部がキャンセルされても処理は続けるが、待機者が全員
+    キャンセルされた場合は処理自体もキャンセルして上流への接続を解放する。
+    キャンセルされた処理の途中結果は誰にも返さない。
+    detach=True で開始した処理は待機者がいなくなっても最後まで実行する。
+    """
+
+    def __init__(self):
+        # 待機者がいなくなってキャンセルした処理の件数
+        self.cancelled = 0
+        self._tasks: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._detached: Set["asyncio.Future[Any]"] = set()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    def tasks(self) -> List["asyncio.Future[Any]"]:
+        """実行中の処理を返す"""
+        return list(self._tasks.values())
+
+    async def run(
+        self, key: Hashable, func: Loader, detach: bool = False
+    ) -> Any:
+        """func() を実行する（同じキーで実行中ならその結果を待つ）
+
+        detach=True の場合、呼び出し側のタイムアウトやキャンセルでは処理を
+        中断しない（複数の呼び出しで共有する構築処理向け）。
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            if detach:
+                self._detached.add(task)
+            task.add_done_callback(lambda done: self._forget(key, done))
+        self._waiters[key] += 1
+        try:
+            # 待機側のキャンセルが他の待機者の取得を巻き込まないよう保護する
+            return await asyncio.shield(task)
+        finally:
+            if self._tasks.get(key) is task:
+                self._waiters[key] -= 1
+                if (
+                    self._waiters[key] == 0
+                    and not task.done()
+                    and task not in self._detached
+                ):
+                    # 以降の呼び出しはキャンセル中の処理を待たずに新たに実行する
+                    self._forget(key, task)
+                    task.cancel()
+                    self.cancelled += 1
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if task in self._detached and task.done():
+            self._detached.discard(task)
+            if not task.cancelled():
+                # 待機者のいない処理の失敗を未取得の例外として警告させない
+                task.exception()
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            del self._waiters[key]
+
+
+class CacheEntry:
+    """キャッシュエントリ（値・取得時刻・再取得用ローダー）"""
+
+    __slots__ = ("value", "fetched_at", "loader")
+
+    def __init__(self, value: Any, fetched_at: float, loader: Loader):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.loader = loader
+
+
+class ResponseCache:
+    """TTL付きのLRUキャッシュ
+
+    TTL経過後も stale_ttl の猶予期間内は古い値を即座に返し、
+    裏で再検証する（stale-while-revalidate）。同一キーの同時取得は
+    1回の上流リクエストにまとめ、待機者が全員キャンセルされた場合は
+    取得も中断する（途中までの値はキャッシュしない）。
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600.0,
+        stale_ttl: float = 3600.0,
+        max_entries: int = 256,
+        revalidate_concurrency: int = 2,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # キーごとのアクセス頻度（RefreshSchedulerが参照する）
+        self.access_counts: Counter = Counter()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.inflight = SingleFlight()
+        self._background: Set["asyncio.Task[Any]"] = set()
+        self._revalidate_limit = asyncio.Semaphore(revalidate_concurrency)
+
+    async def get(self, key: str, loader: Loader) -> Any:
+        """キャッシュから値を返す。なければローダーで取得して保存する"""
+        entry = self.lookup(key, loader)
+        if entry is not None:
+            return entry.value
+        return await self._load(key, loader)
+
+    def lookup(self, key: str, loader: Loader) -> Optional[CacheEntry]:
+        """有効なエントリを返す（期限切れ猶予中なら裏で再検証を開始する）"""
+        self.access_counts[key] += 1
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        age = time.monotonic() - entry.fetched_at
+        if age >= self.ttl + self.stale_ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        if age >= self.ttl:
+            self._spawn(self.revalidate(key, loader))
+        return entry
+
+    def put(self, key: str, value: Any, loader: Loader) -> None:
+        """値を保存する"""
+        self._entries[key] = CacheEntry(value, time.monotonic(), loader)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self.access_counts.pop(evicted, None)
+
+    def expires_in(self, key: str) -> Optional[float]:
+        """TTL切れまでの残り秒数を返す（エントリがなければNone）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return self.ttl - (time.monotonic() - entry.fetched_at)
+
+    async def revalidate(self, key: str, loader: Optional[Loader] = None) -> None:
+        """同時実行数の上限内で値を再取得する（失敗時は古い値を残す）"""
+        if loader is None:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            loader = entry.loader
+        if key in self.inflight:
+            return
+        async with self._revalidate_limit:
+            try:
+                await self._load(key, loader)
+            except Exception:
+                pass
+
+    async def aclose(self) -> None:
+        """実行中のバックグラウンド再検証を停止する"""
+        tasks = list(self._background) + self.inflight.tasks()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _load(self, key: str, loader: Loader) -> Any:
+        return await self.inflight.run(
+            key, lambda: self._run_loader(key, loader)
+        )
+
+    async def _run_loader(self, key: str, loader: Loader) -> Any:
+        value = await loader()
+        self.put(key, value, loader)
+        return value
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+class RefreshScheduler:
+    """アクセス頻度の高いエントリをTTL切れ前に再取得するスケジューラ
+
+    add_job で登録した定期ジョブ（法令一覧の索引更新など）も合わせて実行する。
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        top_n: int = 20,
+        interval: float = 60.0,
+        refresh_ahead: float = 120.0,
+    ):
+        self.cache = cache
+        self.top_n = top_n
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self._jobs: List[Tuple[Callable[[], Awaitable[None]], float]] = []
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    def add_job(self, job: Callable[[], Awaitable[None]], interval: float) -> None:
+        """interval 秒ごとに実行する定期ジョブを登録する"""
+        self._jobs.append((job, interval))
+
+    def start(self) -> None:
+        """バックグラウンドタスクを開始する"""
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._run()))
+        for job, interval in self._jobs:
+            self._tasks.append(asyncio.create_task(self._run_job(job, interval)))
+
+    async def aclose(self) -> None:
+        """スケジューラと実行中の再検証を停止する"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.cache.aclose()
+
+    async def refresh_hot(self) -> None:
+        """上位N件のうちTTL切れが近いエントリを再取得する"""
+        targets = []
+        for key, _ in self.cache.access_counts.most_common(self.top_n):
+            remaining = self.cache.expires_in(key)
+            if remaining is not None and remaining < self.refresh_ahead:
+                targets.append(key)
+        await asyncio.gather(*(self.cache.revalidate(key) for key in targets))
+
+        # 古いアクセス実績の影響を徐々に弱める
+        for key in list(self.cache.access_counts):
+            self.cache.access_counts[key] //= 2
+            if not self.cache.access_counts[key]:
+                del self.cache.access_counts[key]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh_hot()
+
+    async def _run_job(
+        self, job: Callable[[], Awaitable[None]], interval: float
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job()
+            except Exception:
+                pass
@@ -0,0 +1,242 @@
+# 法令一覧（全法令の law_info・revision_info）の列指向スナップショットと集計
+import datetime
+import itertools
+import time
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# 辞書符号化する列（値の種類が少ない文字列）
+CATEGORY_COLUMNS = (
+    "law_type", "category", "current_revision_status", "repeal_status",
+    "law_num_era", "law_num_type", "mission", "amendment_type",
+)
+# 日付の列（日付の通し番号で保持し、0は値なし）
+DATE_COLUMNS = (
+    "promulgation_date", "updated", "amendment_promulgate_date",
+    "amendment_enforcement_date", "amendment_scheduled_enforcement_date",
+    "repeal_date",
+)
+# 整数の列（0は値なし）
+INT_COLUMNS = ("law_num_year",)
+# 集計対象にしない文字列の列（一覧表示と名前索引に使う）
+STRING_COLUMNS = (
+    "law_id", "law_num", "law_revision_id", "law_title", "law_title_kana",
+    "abbrev",
+)
+DATE_UNITS = ("year", "month", "day")
+
+Filter = Union[str, int, Sequence[Union[str, int]]]
+
+
+def _parse_date(value: Any) -> int:
+    """YYYY-MM-DD（日時の場合は日付部分）を日付の通し番号にする"""
+    if not value or not isinstance(value, str):
+        return 0
+    try:
+        return datetime.date.fromisoformat(value[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+def _format_date(ordinal: int, unit: str = "day") -> str:
+    if not ordinal:
+        return ""
+    value = datetime.date.fromordinal(ordinal).isoformat()
+    return value[:{"year": 4, "month": 7}.get(unit, 10)]
+
+
+def _category(value: Any) -> str:
+    # 廃止状況は revision_info では "None"、current_revision_info では false で返る
+    if value is None or value is False or value == "None":
+        return ""
+    return str(value)
+
+
+def _and(left: bytearray, right: bytearray) -> bytearray:
+    """0/1のマスク同士の論理積（整数演算でまとめて計算する）"""
+    size = len(left)
+    result = int.from_bytes(left, "little") & int.from_bytes(right, "little")
+    return bytearray(result.to_bytes(size, "little"))
+
+
+class CatalogSnapshot:
+    """全法令の law_info と revision_info を列ごとの配列で保持する
+
+    文字列の分類は辞書符号化した整数配列、日付は通し番号の整数配列で持ち、
+    絞り込みは列ごとにマスクを作って論理積を取り、集計は該当行の符号を
+    数えて最後に復号する。構築後は変更せず、更新時は merge で新しい
+    スナップショットを作る。
+    """
+
+    def __init__(self):
+        self.loaded_at = time.time()
+        self.strings: Dict[str, List[str]] = {name: [] for name in STRING_COLUMNS}
+        self.codes: Dict[str, array] = {
+            name: array("H") for name in CATEGORY_COLUMNS
+        }
+        self.values: Dict[str, List[str]] = {name: [] for name in CATEGORY_COLUMNS}
+        self.dates: Dict[str, array] = {name: array("i") for name in DATE_COLUMNS}
+        self.ints: Dict[str, array] = {name: array("i") for name in INT_COLUMNS}
+        self._value_codes: Dict[str, Dict[str, int]] = {
+            name: {} for name in CATEGORY_COLUMNS
+        }
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings["law_id"])
+
+    @classmethod
+    def build(cls, laws: Iterable[Dict[str, Any]]) -> "CatalogSnapshot":
+        """法令一覧取得APIの laws 配列から構築する"""
+        snapshot = cls()
+        for law in laws:
+            snapshot._append_law(law)
+        return snapshot
+
+    def merge(self, laws: Iterable[Dict[str, Any]]) -> "CatalogSnapshot":
+        """更新分の laws 配列を反映した新しいスナップショットを返す"""
+        updates: Dict[str, Dict[str, Any]] = {}
+        for law in laws:
+            law_id = (law.get("law_info") or {}).get("law_id")
+            if law_id:
+                updates[law_id] = law
+        snapshot = CatalogSnapshot()
+        for index, law_id in enumerate(self.strings["law_id"]):
+            if law_id not in updates:
+                snapshot._append_row(self.row(index))
+        for law in updates.values():
+            snapshot._append_law(law)
+        return snapshot
+
+    def updated_through(self) -> Optional[str]:
+        """スナップショットに含まれる最新の更新日（増分取得の起点）"""
+        column = self.dates["updated"]
+        return _format_date(max(column)) if column else None
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """1行分の値を復号して返す（日付はYYYY-MM-DD）"""
+        result: Dict[str, Any] = {}
+        for name in STRING_COLUMNS:
+            result[name] = self.strings[name][index]
+        for name in CATEGORY_COLUMNS:
+            result[name] = self.values[name][self.codes[name][index]]
+        for name in DATE_COLUMNS:
+            result[name] = _format_date(self.dates[name][index])
+        for name in INT_COLUMNS:
+            result[name] = self.ints[name][index] or None
+        return result
+
+    def is_current(self, index: int) -> bool:
+        status = self.codes["current_revision_status"][index]
+        return self.values["current_revision_status"][status] == "CurrentEnforced"
+
+    def select(
+        self,
+        filters: Optional[Dict[str, Filter]] = None,
+        date_field: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> List[int]:
+        """条件に一致する行番号を返す（日付の範囲は両端を含む）"""
+        mask = bytearray(b"\x01") * len(self)
+        for name, wanted in (filters or {}).items():
+            if isinstance(wanted, (str, int)):
+                wanted = [wanted]
+            if name in CATEGORY_COLUMNS:
+                lookup = self._value_codes[name]
+                codes = {lookup[str(v)] for v in wanted if str(v) in lookup}
+                column = self.codes[name]
+                mask = _and(mask, bytearray(code in codes for code in column))
+            elif name in INT_COLUMNS:
+                try:
+                    numbers = {int(v) for v in wanted}
+                except ValueError:
+                    raise ValueError(f"{name} は整数で指定してください") from None
+                column = self.ints[name]
+                mask = _and(mask, bytearray(v in numbers for v in column))
+            else:
+                raise ValueError(f"絞り込みに使用できない列です: {name}")
+
+        if date_field is not None:
+            if date_field not in DATE_COLUMNS:
+                raise ValueError(f"日付の列ではありません: {date_field}")
+            low = _parse_date(date_from) if date_from else 1
+            high = _parse_date(date_to) if date_to else datetime.date.max.toordinal()
+            if (date_from and not low) or (date_to and not high):
+                raise ValueError("日付は YYYY-MM-DD 形式で指定してください")
+            column = self.dates[date_field]
+            mask = _and(mask, bytearray(low <= v <= high for v in column))
+
+        return list(itertools.compress(range(len(self)), mask))
+
+    def group_count(
+        self, indices: Sequence[int], columns: Sequence[str],
+        date_unit: str = "year",
+    ) -> List[Tuple[Tuple[Any, ...], int]]:
+        """指定した列の値の組み合わせごとの件数を多い順に返す"""
+        keys = []
+        for name in columns:
+            if name in CATEGORY_COLUMNS:
+                column = self.codes[name]
+                keys.append([column[i] for i in indices])
+            elif name in DATE_COLUMNS:
+                column = self.dates[name]
+                keys.append([column[i] for i in indices])
+            elif name in INT_COLUMNS:
+                column = self.ints[name]
+                keys.append([column[i] for i in indices])
+            else:
+                raise ValueError(f"集計に使用できない列です: {name}")
+
+        # 符号のまま数え、組み合わせごとに1回だけ復号する
+        counts = Counter(zip(*keys)) if keys else Counter({(): len(indices)})
+        decoded: Counter = Counter()
+        for key, count in counts.items():
+            decoded[tuple(
+                self._decode(name, value, date_unit)
+                for name, value in zip(columns, key)
+            )] += count
+        # 値なし（None）は各列の末尾に並べる
+        return sorted(decoded.items(), key=lambda item: (
+            -item[1], [(value is None, value) for value in item[0]]
+        ))
+
+    def _decode(self, name: str, value: int, date_unit: str) -> Any:
+        if name in CATEGORY_COLUMNS:
+            return self.values[name][value]
+        if name in DATE_COLUMNS:
+            return _format_date(value, date_unit)
+        return value or None
+
+    def _append_law(self, law: Dict[str, Any]) -> None:
+        law_info = law.get("law_info") or {}
+        revision = (
+            law.get("current_revision_info") or law.get("revision_info") or {}
+        )
+        if not law_info.get("law_id"):
+            return
+        self._append_row({**revision, **law_info})
+
+    def _append_row(self, row: Dict[str, Any]) -> None:
+        law_id = row["law_id"]
+        if law_id in self._rows:
+            return
+        self._rows[law_id] = len(self)
+        for name in STRING_COLUMNS:
+            self.strings[name].append(row.get(name) or "")
+        for name in CATEGORY_COLUMNS:
+            value = _category(row.get(name))
+            lookup = self._value_codes[name]
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(self.values[name])
+                self.values[name].append(value)
+            self.codes[name].append(code)
+        for name in DATE_COLUMNS:
+            self.dates[name].append(_parse_date(row.get(name)))
+        for name in INT_COLUMNS:
+            try:
+                self.ints[name].append(int(row.get(name) or 0))
+            except ValueError:
+                self.ints[name].append(0)
@@ -0,0 +1,77 @@
+# CPU負荷の高い処理（JSONの復号・抽出・整形など）の実行戦略
+import asyncio
+import concurrent.futures
+import functools
+from typing import Any, Callable, Optional
+
+# 実行モード: inline（常にイベントループ上）/ thread / process
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+class CpuExecutor:
+    """処理対象のサイズに応じてインライン実行とプール実行を切り替える
+
+    threshold バイト未満の小さな処理はイベントループ上でそのまま実行し、
+    それ以上の処理はスレッドプールまたはプロセスプールへ渡して、
+    他のツール呼び出しやキープアライブを待たせないようにする。
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        threshold: int = 256 * 1024,
+        workers: Optional[int] = None,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(
+                f"不正な実行モードです: {mode}（{', '.join(EXECUTOR_MODES)}）"
+            )
+        self.mode = mode
+        self.threshold = threshold
+        self.workers = workers
+        self._thread_pool: Optional[concurrent.futures.Executor] = None
+        self._process_pool: Optional[concurrent.futures.Executor] = None
+
+    async def run(self, size: int, func: Callable[..., Any], *args: Any) -> Any:
+        """func(*args) を実行する（プロセスプール使用時は引数と戻り値をpickleする）"""
+        if self.mode == "inline" or size < self.threshold:
+            return func(*args)
+        if self.mode == "process":
+            pool = self._get_process_pool()
+        else:
+            pool = self._get_thread_pool()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(func, *args))
+
+    async def run_in_thread(
+        self, size: int, func: Callable[..., Any], *args: Any
+    ) -> Any:
+        """pickleできない引数（mmap上のツリーなど）を扱う処理を実行する"""
+        if self.mode == "inline" or size < self.threshold:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_thread_pool(), functools.partial(func, *args)
+        )
+
+    def shutdown(self) -> None:
+        """プールを停止する"""
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = None
+        self._process_pool = None
+
+    def _get_thread_pool(self) -> concurrent.futures.Executor:
+        if self._thread_pool is None:
+            self._thread_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="egov-mcp-cpu"
+            )
+        return self._thread_pool
+
+    def _get_process_pool(self) -> concurrent.futures.Executor:
+        if self._process_pool is None:
+            self._process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers
+            )
+        return self._process_pool
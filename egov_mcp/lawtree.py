@@ -0,0 +1,412 @@
+# 法令本文ツリーのコンパクトなバイナリ表現
+#
+# 法令本文取得APIの law_full_text（{tag, attr, children} の入れ子）を
+# 以下のレイアウトで1ファイルに保存し、mmap上で直接参照する。
+#
+#   ヘッダ | ノード配列×9 | 属性配列×3 | シンボル配列×2 | 文字列ヒープ
+#
+# 配列はすべてint32で、ノードは行きがけ順に並ぶ。タグ名と属性キーは
+# シンボル表に集約し、テキストと属性値はUTF-8のヒープに格納する。
+# 元のノードにあったキー（attr・children）はフラグで保持し、APIレスポンスと
+# 同じ形に戻せるようにする。
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import uuid
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from egov_mcp.xml_stream import LawTextWriter
+
+_MAGIC = b"EGLT"
+_VERSION = 2
+# magic, version, byteorder, ノード数, 属性数, シンボル数, ヒープ長
+_HEADER = struct.Struct("<4sIIIIII")
+_BYTEORDER = 1 if sys.byteorder == "little" else 2
+# テキストノードのタグ
+TEXT_NODE = -1
+# ノードのフラグ（元のノードに children / attr キーがあったか、attr が辞書か）
+_HAS_CHILDREN = 1
+_HAS_ATTR = 2
+_ATTR_DICT = 4
+
+
+def encode_tree(tree: Any) -> bytes:
+    """法令本文ツリーをバイナリ表現に変換する"""
+    symbols: Dict[str, int] = {}
+    heap = bytearray()
+    nodes = [array("i") for _ in range(9)]
+    (tags, parents, first_child, next_sibling,
+     text_offset, text_length, attr_start, attr_count, flags) = nodes
+    attr_key, attr_offset, attr_length = (array("i") for _ in range(3))
+    symbol_offset, symbol_length = array("i"), array("i")
+
+    def add_string(value: str) -> int:
+        data = value.encode("utf-8")
+        heap.extend(data)
+        return len(data)
+
+    def intern(name: str) -> int:
+        symbol = symbols.get(name)
+        if symbol is None:
+            symbol = symbols[name] = len(symbol_offset)
+            symbol_offset.append(len(heap))
+            symbol_length.append(add_string(name))
+        return symbol
+
+    last_child: Dict[int, int] = {}
+    stack = [(tree, -1)]
+    while stack:
+        node, parent = stack.pop()
+        index = len(tags)
+        for column in nodes:
+            column.append(-1)
+        parents[index] = parent
+        attr_start[index] = len(attr_key)
+        attr_count[index] = 0
+        flags[index] = 0
+        if parent >= 0:
+            previous = last_child.get(parent)
+            if previous is None:
+                first_child[parent] = index
+            else:
+                next_sibling[previous] = index
+            last_child[parent] = index
+
+        if not isinstance(node, dict):
+            tags[index] = TEXT_NODE
+            text_offset[index] = len(heap)
+            text_length[index] = add_string(str(node))
+            continue
+
+        tags[index] = intern(node.get("tag") or "")
+        attrs = node.get("attr")
+        flags[index] = (
+            (_HAS_CHILDREN if "children" in node else 0)
+            | (_HAS_ATTR if "attr" in node else 0)
+            | (_ATTR_DICT if isinstance(attrs, dict) else 0)
+        )
+        if isinstance(attrs, dict):
+            for key, value in attrs.items():
+                attr_key.append(intern(key))
+                attr_offset.append(len(heap))
+                attr_length.append(add_string(str(value)))
+            attr_count[index] = len(attrs)
+        # 先頭の子から順に処理されるよう逆順に積む
+        for child in reversed(node.get("children") or []):
+            stack.append((child, index))
+
+    header = _HEADER.pack(
+        _MAGIC, _VERSION, _BYTEORDER,
+        len(tags), len(attr_key), len(symbol_offset), len(heap),
+    )
+    parts = [header]
+    for column in (*nodes, attr_key, attr_offset, attr_length,
+                   symbol_offset, symbol_length):
+        parts.append(column.tobytes())
+    parts.append(bytes(heap))
+    return b"".join(parts)
+
+
+def parse_law_document(content: bytes) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """法令本文取得APIのJSONを (メタデータ, 本文ツリーのバイナリ表現) に分解する
+
+    イベントループ外（プロセスプールを含む）で実行できるよう、
+    入出力はpickle可能な値のみとする。
+    """
+    meta = json.loads(content)
+    body = meta.pop("law_full_text", None)
+    return meta, encode_tree(body) if body is not None else None
+
+
+class CompactTree:
+    """バイナリ表現の法令本文ツリー（バッファを直接参照する）"""
+
+    ROOT = 0
+
+    def __init__(self, buffer: Any):
+        view = memoryview(buffer)
+        (magic, version, byteorder, node_count, attr_total,
+         symbol_count, heap_length) = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC or version != _VERSION or byteorder != _BYTEORDER:
+            raise ValueError("未対応の法令ツリー形式です")
+
+        offset = _HEADER.size
+
+        def take(count: int) -> memoryview:
+            nonlocal offset
+            column = view[offset:offset + count * 4].cast("i")
+            offset += count * 4
+            return column
+
+        (self._tag, self._parent, self._first_child, self._next_sibling,
+         self._text_offset, self._text_length,
+         self._attr_start, self._attr_count, self._flags) = (
+            take(node_count) for _ in range(9)
+        )
+        self._attr_key = take(attr_total)
+        self._attr_offset = take(attr_total)
+        self._attr_length = take(attr_total)
+        symbol_offset = take(symbol_count)
+        symbol_length = take(symbol_count)
+        self._heap = view[offset:offset + heap_length]
+        self._symbols = [
+            self._string(symbol_offset[i], symbol_length[i])
+            for i in range(symbol_count)
+        ]
+        self._symbol_ids = {name: i for i, name in enumerate(self._symbols)}
+
+    @classmethod
+    def open(cls, path: str) -> "CompactTree":
+        """ファイルをmmapして開く（mmapはツリーが参照されなくなった時点で解放される）"""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped)
+
+    def __len__(self) -> int:
+        return len(self._tag)
+
+    def tag(self, index: int) -> Optional[str]:
+        """タグ名を返す（テキストノードはNone）"""
+        symbol = self._tag[index]
+        return None if symbol == TEXT_NODE else self._symbols[symbol]
+
+    def text(self, index: int) -> str:
+        """テキストノードの文字列を返す"""
+        return self._string(self._text_offset[index], self._text_length[index])
+
+    def attrs(self, index: int) -> Dict[str, str]:
+        """属性を辞書で返す"""
+        start = self._attr_start[index]
+        return {
+            self._symbols[self._attr_key[i]]: self._string(
+                self._attr_offset[i], self._attr_length[i]
+            )
+            for i in range(start, start + self._attr_count[index])
+        }
+
+    def children(self, index: int) -> Iterator[int]:
+        """子ノードを順に返す"""
+        child = self._first_child[index]
+        while child != -1:
+            yield child
+            child = self._next_sibling[child]
+
+    def find_all(self, tag: str) -> Iterator[int]:
+        """指定タグのノードを文書順に返す（タグ配列の走査のみで判定）"""
+        symbol = self._symbol_ids.get(tag)
+        if symbol is None:
+            return
+        for index, value in enumerate(self._tag):
+            if value == symbol:
+                yield index
+
+    def article(self, num: str) -> Optional[int]:
+        """本則の条番号（Num属性、例: "1", "9_2"）から条ノードを返す"""
+        main = self._symbol_ids.get("MainProvision")
+        for index in self.find_all("Article"):
+            if self.attrs(index).get("Num") != num:
+                continue
+            parent = self._parent[index]
+            while parent != -1 and self._tag[parent] != main:
+                parent = self._parent[parent]
+            if parent != -1:
+                return index
+        return None
+
+    def to_obj(self, index: int = ROOT) -> Any:
+        """APIレスポンスと同じ {tag, attr, children} 形式に戻す"""
+        if self._tag[index] == TEXT_NODE:
+            return self.text(index)
+        flags = self._flags[index]
+        result: Dict[str, Any] = {"tag": self.tag(index)}
+        if flags & _HAS_ATTR:
+            attrs = self.attrs(index)
+            result["attr"] = attrs if attrs or flags & _ATTR_DICT else ""
+        if flags & _HAS_CHILDREN:
+            result["children"] = [
+                self.to_obj(child) for child in self.children(index)
+            ]
+        return result
+
+    def render_text(
+        self, index: int = ROOT, writer: Optional["LawTextWriter"] = None
+    ) -> str:
+        """本文を条・項・号ごとの行に変換する"""
+        from egov_mcp.xml_stream import LawTextWriter
+
+        writer = writer or LawTextWriter()
+        for _ in self.write_text(index, writer):
+            pass
+        return writer.getvalue()
+
+    def write_text(self, index: int, writer: "LawTextWriter") -> Iterator[None]:
+        """本文を writer に書き込む（要素を1つ書き込むごとに制御を返す）"""
+        from egov_mcp.xml_stream import TEXT_TAGS
+
+        stack = [index]
+        while stack:
+            node = stack.pop()
+            tag = self.tag(node)
+            if tag in TEXT_TAGS:
+                writer.add(tag, "".join(self._texts(node)))
+                yield
+            elif tag is not None:
+                stack.extend(reversed(list(self.children(node))))
+
+    def _texts(self, index: int) -> Iterator[str]:
+        """子孫のテキストを文書順に返す（ルビの読みは除く）"""
+        stack = [index]
+        while stack:
+            node = stack.pop()
+            tag = self.tag(node)
+            if tag is None:
+                yield self.text(node)
+            elif tag != "Rt":
+                stack.extend(reversed(list(self.children(node))))
+
+    def _string(self, offset: int, length: int) -> str:
+        return str(self._heap[offset:offset + length], "utf-8")
+
+
+class LawTreeStore:
+    """コンパクト形式の法令本文ツリーを保存するディレクトリ
+
+    保存したファイルは max_entries 件を超えると古いものから削除する。
+    削除済みのファイルも開いているmmapからは引き続き参照できる。
+    save はイベントループ外のスレッドから同時に呼び出してよい。
+    """
+
+    def __init__(self, directory: str, max_entries: int = 256):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._paths: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, key: str, encoded: bytes) -> CompactTree:
+        """バイナリ表現のツリーを保存し、mmapで開いたものを返す"""
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        # 参照中の古いファイルを上書きしないよう毎回別名で書き出す
+        path = os.path.join(
+            self.directory, f"{digest}-{uuid.uuid4().hex[:8]}.eglt"
+        )
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(encoded)
+        os.replace(temp_path, path)
+        tree = CompactTree.open(path)
+
+        with self._lock:
+            removed = []
+            previous = self._paths.pop(key, None)
+            self._paths[key] = path
+            if previous is not None:
+                removed.append(previous)
+            while len(self._paths) > self.max_entries:
+                removed.append(self._paths.popitem(last=False)[1])
+        for old_path in removed:
+            _remove(old_path)
+        return tree
+
+    def close(self) -> None:
+        """このプロセスで保存したファイルを削除する"""
+        with self._lock:
+            paths = list(self._paths.values())
+            self._paths.clear()
+        for path in paths:
+            _remove(path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class LawDocument:
+    """法令本文取得APIのレスポンス（本文ツリーのみコンパクト形式で保持）"""
+
+    __slots__ = ("meta", "tree", "size")
+
+    def __init__(
+        self, meta: Dict[str, Any], tree: Optional[CompactTree], size: int = 0
+    ):
+        self.meta = meta
+        self.tree = tree
+        # 元のレスポンスのバイト数（実行戦略の判定に使う）
+        self.size = size
+
+    def needs_body(self, fields: Optional[List[str]]) -> bool:
+        """フィールド指定に本文が含まれるかどうか"""
+        if not fields:
+            return True
+        return any(field.split(".", 1)[0] == "law_full_text" for field in fields)
+
+    def to_dict(
+        self, fields: Optional[List[str]] = None, index: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """APIレスポンス形式の辞書に戻す（本文は必要な場合のみ展開）"""
+        result = dict(self.meta)
+        if self.tree is not None and self.needs_body(fields):
+            result["law_full_text"] = self.tree.to_obj(
+                CompactTree.ROOT if index is None else index
+            )
+        return result
+
+    def render_text(
+        self, meta: Dict[str, Any], fields: Optional[List[str]] = None,
+        index: Optional[int] = None,
+    ) -> str:
+        """メタデータと本文をコンパクトなテキストに変換する"""
+        from egov_mcp.xml_stream import LawTextWriter
+
+        writer = LawTextWriter()
+        for path, value in _flatten(meta):
+            writer.add_line(f"{path}: {value}")
+        if self.tree is not None and self.needs_body(fields):
+            self.tree.render_text(
+                CompactTree.ROOT if index is None else index, writer
+            )
+        return writer.getvalue()
+
+    def iter_text(
+        self, meta: Dict[str, Any], fields: Optional[List[str]] = None,
+        index: Optional[int] = None,
+    ) -> Iterator[str]:
+        """render_text と同じテキストを、全体を連結せずに少しずつ返す"""
+        from egov_mcp.xml_stream import LawTextWriter
+
+        writer = LawTextWriter()
+        for path, value in _flatten(meta):
+            writer.add_line(f"{path}: {value}")
+        if self.tree is not None and self.needs_body(fields):
+            steps = self.tree.write_text(
+                CompactTree.ROOT if index is None else index, writer
+            )
+            for _ in steps:
+                text = writer.drain()
+                if text:
+                    yield text
+        yield writer.getvalue()
+
+
+def _flatten(value: Any, prefix: str = "") -> Iterator[Any]:
+    """入れ子の辞書・配列を (ドット区切りのパス, 値) に展開する"""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key == "law_full_text":
+                continue
+            yield from _flatten(child, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _flatten(child, prefix)
+    elif value is not None and value != "":
+        yield prefix, value
@@ -1,16 +1,117 @@
 #!/usr/bin/env python3
 import asyncio
+import datetime
+import itertools
 import json
+import os
+import sys
+import tempfile
 import urllib.parse
-from typing import Any, Dict, List, Optional
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import httpx
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
+from egov_mcp.attachments import AttachmentStore, StoredAttachment
+from egov_mcp.cache import (
+    Loader, RefreshScheduler, ResponseCache, SingleFlight,
+)
+from egov_mcp.catalog import (
+    CATEGORY_COLUMNS, DATE_COLUMNS, DATE_UNITS, INT_COLUMNS, CatalogSnapshot,
+)
+from egov_mcp.executor import CpuExecutor
+from egov_mcp.lawtree import LawDocument, LawTreeStore, parse_law_document
+from egov_mcp.pagination import (
+    PageStore, decode_cursor, encode_cursor, find_cut, iter_chunks,
+)
+from egov_mcp.progress import ProgressReporter, current_progress, report_progress
+from egov_mcp.recording import create_transport, recorded_urls
+from egov_mcp.resolver import (
+    LawCandidate, LawResolver, is_law_identifier, is_law_number,
+)
+from egov_mcp.xml_stream import XmlProjector
+
 
 app = Server("egov-mcp")
 BASE_URL = "https://laws.e-gov.go.jp/api/2"
-http_client = httpx.AsyncClient(timeout=30.0)
+# HTTPクライアントは初回利用時にイベントループ内で生成する
+_http_client: Optional[httpx.AsyncClient] = None
+_tools: Optional[List[Tool]] = None
+
+# 1回のツール応答で返す最大文字数（0以下で無制限）
+DEFAULT_MAX_CHARS = int(os.environ.get("EGOV_MCP_MAX_CHARS", "100000"))
+# 1回のツール呼び出しの処理時間の上限（ミリ秒、0以下で無制限）
+DEFAULT_TIMEOUT_MS = int(os.environ.get("EGOV_MCP_TIMEOUT_MS", "60000"))
+# ツール呼び出しの件数・タイムアウト・キャンセルの集計（終了時に標準エラーへ出力）
+metrics: Counter = Counter()
+# 継続カーソル用に保持するテキストの合計文字数の上限と保持期間（秒）
+page_store = PageStore(
+    max_chars=int(os.environ.get("EGOV_MCP_PAGE_STORE_CHARS", "8000000")),
+    ttl=float(os.environ.get("EGOV_MCP_PAGE_STORE_TTL", "1800")),
+)
+# 段階的出力（progressive）で1つの TextContent に入れる文字数の目安
+PROGRESSIVE_CHUNK_CHARS = int(
+    os.environ.get("EGOV_MCP_PROGRESSIVE_CHUNK_CHARS", "20000")
+)
+# 進捗通知のうち本文のダウンロードと解析が占める割合（残りは整形）
+DOWNLOAD_PROGRESS = 0.6
+PARSE_PROGRESS = 0.7
+# キャッシュ済みXMLを逐次解析に渡す単位（バイト）
+XML_CHUNK_SIZE = 64 * 1024
+
+# 上流レスポンスのキャッシュ設定（秒）
+response_cache = ResponseCache(
+    ttl=float(os.environ.get("EGOV_MCP_CACHE_TTL", "600")),
+    stale_ttl=float(os.environ.get("EGOV_MCP_CACHE_STALE_TTL", "3600")),
+    max_entries=int(os.environ.get("EGOV_MCP_CACHE_SIZE", "256")),
+    revalidate_concurrency=int(
+        os.environ.get("EGOV_MCP_REFRESH_CONCURRENCY", "2")
+    ),
+)
+CACHE_DIR = os.environ.get(
+    "EGOV_MCP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "egov-mcp")
+)
+# コンパクト形式の法令本文ツリーの保存先
+law_tree_store = LawTreeStore(CACHE_DIR, max_entries=response_cache.max_entries)
+# 添付ファイルの保存先（合計サイズの上限付き）と、一括取得時の上流への同時リクエスト数
+attachment_store = AttachmentStore(
+    os.path.join(CACHE_DIR, "attachments"),
+    max_bytes=int(
+        os.environ.get("EGOV_MCP_ATTACHMENT_CACHE_BYTES", "536870912")
+    ),
+)
+ATTACHMENT_CONCURRENCY = int(
+    os.environ.get("EGOV_MCP_ATTACHMENT_CONCURRENCY", "4")
+)
+# 大きなレスポンスの復号・抽出・整形をイベントループ外で実行する
+_cpu_workers = os.environ.get("EGOV_MCP_CPU_WORKERS")
+cpu_executor = CpuExecutor(
+    mode=os.environ.get("EGOV_MCP_CPU_POOL", "thread"),
+    threshold=int(os.environ.get("EGOV_MCP_OFFLOAD_THRESHOLD", "262144")),
+    workers=int(_cpu_workers) if _cpu_workers else None,
+)
+refresh_scheduler = RefreshScheduler(
+    response_cache,
+    top_n=int(os.environ.get("EGOV_MCP_REFRESH_TOP_N", "20")),
+    interval=float(os.environ.get("EGOV_MCP_REFRESH_INTERVAL", "60")),
+)
+
+# 上流との通信の記録先・再生元（再生時は上流に接続しない）
+RECORD_PATH = os.environ.get("EGOV_MCP_RECORD")
+REPLAY_PATH = os.environ.get("EGOV_MCP_REPLAY")
+# 再生時の待ち時間の倍率（1.0で記録どおり、0で待ち時間なし）
+REPLAY_TIMING = float(os.environ.get("EGOV_MCP_REPLAY_TIMING", "1.0"))
+# 起動時にキャッシュへ読み込む記録ファイル
+WARM_PATH = os.environ.get("EGOV_MCP_WARM_FROM")
+
+# 法令一覧のスナップショットと法令名から法令IDを解決する索引
+# （初回の集計・名前指定時に構築し、以降は更新分のみを定期的に反映する）
+CATALOG_PAGE_SIZE = 1000
+catalog: Optional[CatalogSnapshot] = None
+law_resolver = LawResolver()
+# 法令一覧の取得・添付ファイルの取得の同時実行をまとめる
+single_flight = SingleFlight()
 
 
 def extract_fields(data: Any, fields: List[str]) -> Any:
@@ -212,14 +313,62 @@ def format_response(
         )
 
 
+def render_json(
+    content: bytes,
+    debug_info: str,
+    fields_only: Optional[List[str]] = None,
+    filter_current: bool = False,
+) -> str:
+    """JSONレスポンスの復号・抽出・整形をまとめて行う
+
+    プロセスプールでも実行できるよう、入出力はバイト列と文字列のみとする。
+    """
+    return format_response(
+        json.loads(content), debug_info, fields_only, filter_current
+    )
+
+
 @app.list_tools()
 async def list_tools() -> List[Tool]:
-    """利用可能なツールのリストを返す"""
+    """利用可能なツールのリストを返す（定義は初回のみ組み立てる）"""
+    global _tools
+    if _tools is None:
+        _tools = build_tools()
+    return _tools
+
+
+def build_tools() -> List[Tool]:
+    """ツール定義を組み立てる"""
     law_types = [
         "Constitution", "Act", "CabinetOrder", 
         "MinisterialOrdinance", "Rule"
     ]
     eras = ["Meiji", "Taisho", "Showa", "Heisei", "Reiwa"]
+    # 全ツール共通の出力サイズ制御パラメータ
+    common_properties = {
+        "max_chars": {
+            "type": "integer",
+            "description": (
+                f"応答の最大文字数（デフォルト: {DEFAULT_MAX_CHARS}）。"
+                "超過分は条・項・号や文の区切りで打ち切り、継続カーソルを返します"
+            ),
+            "minimum": 1,
+        },
+        "cursor": {
+            "type": "string",
+            "description": (
+                "前回の応答で返された継続カーソル（指定時は続きのページのみを返す）"
+            ),
+        },
+        "timeout_ms": {
+            "type": "integer",
+            "description": (
+                f"処理時間の上限（ミリ秒、デフォルト: {DEFAULT_TIMEOUT_MS}）。"
+                "超過した場合は上流からの取得を中断してエラーを返します"
+            ),
+            "minimum": 1,
+        },
+    }
 
     return [
         Tool(
@@ -228,6 +377,7 @@ async def list_tools() -> List[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    **common_properties,
                     "law_id": {
                         "type": "string",
                         "description": "法令ID（指定時は単一法令の詳細を取得）",
@@ -304,13 +454,20 @@ async def list_tools() -> List[Tool]:
         ),
         Tool(
             name="get_law_data",
-            description="特定の法令の本文データを取得します（法令ID/番号/履歴IDを指定）",
+            description=(
+                "特定の法令の本文データを取得します"
+                "（法令ID/番号/履歴ID、または法令名・略称を指定）"
+            ),
             inputSchema={
                 "type": "object",
                 "properties": {
+                    **common_properties,
                     "law_revision_id": {
                         "type": "string", 
-                        "description": "法令ID/番号/履歴ID"
+                        "description": (
+                            "法令ID/番号/履歴ID、または法令名・略称・読み"
+                            "（例: 個人情報保護法）"
+                        ),
                     },
                     "content_type": {
                         "type": "string",
@@ -330,8 +487,11 @@ async def list_tools() -> List[Tool]:
                     },
                     "response_format": {
                         "type": "string",
-                        "enum": ["json", "xml"],
-                        "description": "取得フォーマット（デフォルト: json）",
+                        "enum": ["json", "xml", "text"],
+                        "description": (
+                            "取得フォーマット（デフォルト: json）。"
+                            "text はXMLを逐次解析して条文をコンパクトなテキストに変換"
+                        ),
                         "default": "json",
                     },
                     "fields_only": {
@@ -339,6 +499,21 @@ async def list_tools() -> List[Tool]:
                         "items": {"type": "string"},
                         "description": "取得したいフィールドのみを指定（content_typeより優先）",
                     },
+                    "article": {
+                        "type": "string",
+                        "description": (
+                            "本則の条番号を指定すると該当条のみを返す"
+                            "（例: \"1\"、第九条の二は \"9_2\"）"
+                        ),
+                    },
+                    "progressive": {
+                        "type": "boolean",
+                        "description": (
+                            "条の区切りで分割した複数のテキストとして返す"
+                            "（大きな法令向け）"
+                        ),
+                        "default": False,
+                    },
                 },
                 "required": ["law_revision_id"],
             },
@@ -349,6 +524,7 @@ async def list_tools() -> List[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    **common_properties,
                     "law_id": {
                         "type": "string", 
                         "description": "法令IDまたは法令番号"
@@ -382,6 +558,7 @@ async def list_tools() -> List[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    **common_properties,
                     "keyword": {
                         "type": "string", 
                         "description": "検索キーワード"
@@ -420,8 +597,11 @@ async def list_tools() -> List[Tool]:
                     },
                     "response_format": {
                         "type": "string",
-                        "enum": ["json", "xml"],
-                        "description": "取得フォーマット（デフォルト: json）",
+                        "enum": ["json", "xml", "text"],
+                        "description": (
+                            "取得フォーマット（デフォルト: json）。"
+                            "text はXMLを逐次解析してコンパクトなテキストに変換"
+                        ),
                         "default": "json",
                     },
                     "offset": {
@@ -442,6 +622,24 @@ async def list_tools() -> List[Tool]:
                         "items": {"type": "string"},
                         "description": "取得したいフィールドのみを指定",
                     },
+                    "progressive": {
+                        "type": "boolean",
+                        "description": (
+                            "next_offset をたどって続きのページも取得し、"
+                            "ページごとに分けて返す（json のみ）"
+                        ),
+                        "default": False,
+                    },
+                    "max_pages": {
+                        "type": "integer",
+                        "description": (
+                            "progressive 指定時に取得する最大ページ数"
+                            "（デフォルト: 10）"
+                        ),
+                        "default": 10,
+                        "minimum": 1,
+                        "maximum": 50,
+                    },
                 },
                 "required": ["keyword"],
             },
@@ -452,6 +650,7 @@ async def list_tools() -> List[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    **common_properties,
                     "law_revision_id": {
                         "type": "string", 
                         "description": "法令履歴ID"
@@ -464,12 +663,32 @@ async def list_tools() -> List[Tool]:
                 "required": ["law_revision_id", "src"],
             },
         ),
+        Tool(
+            name="prefetch_attachments",
+            description=(
+                "法令の添付ファイルをまとめて並行取得してローカルに保存し、"
+                "一覧（マニフェスト）を返します。以降の get_attachment は"
+                "保存済みのファイルから即座に返されます"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    **common_properties,
+                    "law_revision_id": {
+                        "type": "string",
+                        "description": "法令ID/番号/履歴ID"
+                    },
+                },
+                "required": ["law_revision_id"],
+            },
+        ),
         Tool(
             name="get_law_file",
             description="法令本文ファイルを取得します（法令ID/番号/履歴IDとファイル形式を指定）",
             inputSchema={
                 "type": "object",
                 "properties": {
+                    **common_properties,
                     "law_revision_id": {
                         "type": "string", 
                         "description": "法令ID/番号/履歴ID"
@@ -483,12 +702,212 @@ async def list_tools() -> List[Tool]:
                 "required": ["law_revision_id", "type"],
             },
         ),
+        Tool(
+            name="law_stats",
+            description=(
+                "全法令の一覧（法令情報と現行の改正情報）を集計します。"
+                "分類ごとの件数、期間内に公布・施行された法令の抽出などに使用"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    **common_properties,
+                    "group_by": {
+                        "type": "array",
+                        "items": {
+                            "type": "string",
+                            "enum": [
+                                *CATEGORY_COLUMNS, *INT_COLUMNS, *DATE_COLUMNS
+                            ],
+                        },
+                        "description": (
+                            "件数を集計する列（例: ['category']）。"
+                            "省略時は該当する法令の一覧を返す"
+                        ),
+                    },
+                    "date_unit": {
+                        "type": "string",
+                        "enum": list(DATE_UNITS),
+                        "description": "日付の列で集計する単位（デフォルト: year）",
+                        "default": "year",
+                    },
+                    "filters": {
+                        "type": "object",
+                        "description": (
+                            "列の値での絞り込み（値の配列はいずれかに一致）。"
+                            "例: {\"law_type\": \"Act\", "
+                            "\"current_revision_status\": \"CurrentEnforced\"}"
+                        ),
+                    },
+                    "date_field": {
+                        "type": "string",
+                        "enum": list(DATE_COLUMNS),
+                        "description": "期間で絞り込む日付の列",
+                    },
+                    "date_from": {
+                        "type": "string",
+                        "description": "期間の開始日（YYYY-MM-DD、当日を含む）",
+                    },
+                    "date_to": {
+                        "type": "string",
+                        "description": "期間の終了日（YYYY-MM-DD、当日を含む）",
+                    },
+                    "within_days": {
+                        "type": "integer",
+                        "description": (
+                            "今日から指定日数後まで（負の値は指定日数前から今日まで）"
+                            "の期間で絞り込む（date_from・date_toの代わり）"
+                        ),
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "返す法令・集計結果の件数の上限（デフォルト: 20）",
+                        "default": 20,
+                        "minimum": 1,
+                        "maximum": 1000,
+                    },
+                },
+                "required": [],
+            },
+        ),
     ]
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
     """ツールの実行"""
+    arguments = dict(arguments or {})
+    max_chars = arguments.pop("max_chars", DEFAULT_MAX_CHARS)
+    cursor = arguments.pop("cursor", None)
+    timeout_ms = arguments.pop("timeout_ms", DEFAULT_TIMEOUT_MS)
+    for key, value in (("max_chars", max_chars), ("timeout_ms", timeout_ms)):
+        if not isinstance(value, int) or isinstance(value, bool):
+            return [TextContent(
+                type="text", text=f"エラー: {key} パラメータは整数で指定してください"
+            )]
+    if cursor:
+        return resume_page(cursor, max_chars)
+
+    metrics["tool_calls"] += 1
+    reporter = request_progress()
+    context_token = current_progress.set(reporter)
+    try:
+        # クライアントからのキャンセル通知や期限切れで処理を中断すると、
+        # 上流への取得も中断されて接続がプールに戻る
+        contents = await asyncio.wait_for(
+            dispatch_tool(name, arguments),
+            timeout_ms / 1000 if timeout_ms > 0 else None,
+        )
+    except asyncio.TimeoutError:
+        metrics["tool_timeouts"] += 1
+        return [TextContent(type="text", text=(
+            f"エラー: {timeout_ms}ミリ秒以内に処理が完了しなかったため中断しました。"
+            f"timeout_ms を延ばすか、fields_only・article などで取得範囲を"
+            f"絞って再実行してください"
+        ))]
+    except asyncio.CancelledError:
+        metrics["tool_cancelled"] += 1
+        raise
+    finally:
+        current_progress.reset(context_token)
+        if reporter is not None:
+            reporter.close()
+    return paginate_contents(contents, max_chars)
+
+
+def request_progress() -> Optional[ProgressReporter]:
+    """クライアントが進捗通知を求めている場合に通知先を返す"""
+    try:
+        context = app.request_context
+    except LookupError:
+        return None
+    token = context.meta.progressToken if context.meta else None
+    if token is None:
+        return None
+    return ProgressReporter(context.session, token, str(context.request_id))
+
+
+def paginate_contents(
+    contents: List[TextContent], max_chars: int
+) -> List[TextContent]:
+    """応答が上限を超える場合は構造上の区切りで打ち切り、継続カーソルを付与する
+
+    複数のチャンクからなる応答は、上限に収まるチャンクまでをそのまま返す。
+    応答全体を保持できない場合はカーソルを付けずに先頭ページのみを返す。
+    """
+    if max_chars <= 0 or not contents:
+        return contents
+    total = sum(len(content.text) for content in contents)
+    if total <= max_chars:
+        return contents
+
+    text = "".join(content.text for content in contents)
+    key = page_store.put(text)
+    page: List[TextContent] = []
+    size = 0
+    for content in contents:
+        if size + len(content.text) > max_chars:
+            break
+        page.append(content)
+        size += len(content.text)
+    if not page:
+        return [TextContent(
+            type="text", text=render_page(key, text, 0, max_chars)
+        )]
+    trailer = page_trailer(key, len(text), 0, size).lstrip("\n")
+    return page + [TextContent(type="text", text=trailer)]
+
+
+def resume_page(cursor: str, max_chars: int) -> List[TextContent]:
+    """継続カーソルから続きのページを返す（再取得・再解析は行わない）"""
+    try:
+        key, offset = decode_cursor(cursor)
+    except ValueError as e:
+        return [TextContent(type="text", text=f"エラー: {str(e)}")]
+
+    text = page_store.get(key)
+    if text is None or offset > len(text):
+        return [TextContent(type="text", text=(
+            "エラー: カーソルの有効期限が切れています。"
+            "元のリクエストを再実行してください"
+        ))]
+    if max_chars <= 0:
+        max_chars = len(text) - offset
+    return [TextContent(
+        type="text", text=render_page(key, text, offset, max_chars)
+    )]
+
+
+def render_page(
+    key: Optional[str], text: str, offset: int, max_chars: int
+) -> str:
+    """1ページ分のテキストと継続情報を組み立てる"""
+    cut = find_cut(text, offset, max_chars)
+    return text[offset:cut] + page_trailer(key, len(text), offset, cut)
+
+
+def page_trailer(key: Optional[str], length: int, offset: int, cut: int) -> str:
+    """ページ末尾に付ける表示範囲と継続カーソルの案内（key がNoneなら続きなし）"""
+    if cut >= length:
+        return f"\n\n[{offset}-{cut}/{length}文字: 最終ページ]"
+    if key is None:
+        return (
+            f"\n\n[{offset}-{cut}/{length}文字を表示。応答全体が継続取得用に"
+            f"保持できる上限（EGOV_MCP_PAGE_STORE_CHARS）を超えるため、"
+            f"続きは取得できません。fields_only・article などで範囲を絞って"
+            f"再実行してください]"
+        )
+    return (
+        f"\n\n[{offset}-{cut}/{length}文字を表示。"
+        f"続きは cursor=\"{encode_cursor(key, cut)}\" を指定して"
+        f"ツールを再度呼び出してください]"
+    )
+
+
+async def dispatch_tool(
+    name: str, arguments: Dict[str, Any]
+) -> List[TextContent]:
+    """ツール名に応じてハンドラを呼び出す"""
     try:
         if name == "get_laws":
             return await get_laws(arguments)
@@ -500,11 +919,21 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             return await search_keyword(arguments)
         elif name == "get_attachment":
             return await get_attachment(arguments)
+        elif name == "prefetch_attachments":
+            return await prefetch_attachments(arguments)
         elif name == "get_law_file":
             return await get_law_file(arguments)
+        elif name == "law_stats":
+            return await law_stats(arguments)
         else:
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
-    except httpx.HTTPStatusError as e:
+    except Exception as e:
+        return format_error(e)
+
+
+def format_error(e: Exception) -> List[TextContent]:
+    """ツール実行時の例外をエラーメッセージに変換する"""
+    if isinstance(e, httpx.HTTPStatusError):
         if e.response.status_code == 404:
             return [TextContent(type="text", text=(
                 f"Error: リクエストしたリソースが見つかりません。\n"
@@ -520,8 +949,7 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
                 f"HTTP Error {e.response.status_code}: {str(e)}\n"
                 f"リクエストURL: {e.request.url}"
             ))]
-    except Exception as e:
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
+    return [TextContent(type="text", text=f"Error: {str(e)}")]
 
 
 async def get_laws(arguments: Dict[str, Any]) -> List[TextContent]:
@@ -596,13 +1024,10 @@ async def get_laws(arguments: Dict[str, Any]) -> List[TextContent]:
     else:
         url = f"{BASE_URL}/laws"
 
-    response = await http_client.get(url)
-    response.raise_for_status()
+    response = await fetch(url)
 
     debug_info = f"Request URL: {url}\n"
 
-    result = response.json()
-    
     # content_typeとfields_onlyの処理
     content_type = arguments.get("content_type", "full")
     fields_to_extract = arguments.get("fields_only")
@@ -612,17 +1037,24 @@ async def get_laws(arguments: Dict[str, Any]) -> List[TextContent]:
     # 現行法令フィルタリングの処理
     filter_current = arguments.get("filter_current_only", False)
     
-    text = format_response(
-        result, debug_info, fields_to_extract, filter_current
+    text = await cpu_executor.run(
+        len(response.content), render_json, response.content,
+        debug_info, fields_to_extract, filter_current,
     )
     return [TextContent(type="text", text=text)]
 
 
-async def get_law_data(arguments: Dict[str, Any]) -> List[TextContent]:
-    """法令本文取得 - /law_data/{law_id_or_num_or_revision_id} エンドポイント用"""
+async def get_law_data(
+    arguments: Dict[str, Any], resolve: bool = True
+) -> List[TextContent]:
+    """法令本文取得 - /law_data/{law_id_or_num_or_revision_id} エンドポイント用
+
+    resolve=True の場合、法令ID・法令番号以外の入力は名前索引で法令IDに解決する。
+    """
     # バリデーション: 有効なパラメータのリスト
     valid_params = {
-        "law_revision_id", "content_type", "response_format", "fields_only"
+        "law_revision_id", "content_type", "response_format", "fields_only",
+        "article", "progressive",
     }
 
     # 無効なパラメータをチェック
@@ -632,12 +1064,14 @@ async def get_law_data(arguments: Dict[str, Any]) -> List[TextContent]:
             f"エラー: 無効なパラメータが検出されました: "
             f"{', '.join(invalid_params)}\n\n"
             f"get_law_data で使用可能なパラメータ:\n"
-            f"- law_revision_id: 法令ID/番号/履歴ID（必須）\n"
+            f"- law_revision_id: 法令ID/番号/履歴ID、または法令名・略称（必須）\n"
             f"- content_type: 取得する内容タイプ (full, title_only, "
             f"body_only, summary, basic_info)\n"
-            f"- response_format: 取得フォーマット (json, xml)"
+            f"- response_format: 取得フォーマット (json, xml, text)"
             f"（デフォルト: json）\n"
             f"- fields_only: 取得したいフィールドのみを指定\n"
+            f"- article: 取得する本則の条番号（例: 1, 9_2）\n"
+            f"- progressive: 条の区切りで分割した複数のテキストとして返す\n"
         )
         return [TextContent(type="text", text=error_msg)]
 
@@ -649,35 +1083,417 @@ async def get_law_data(arguments: Dict[str, Any]) -> List[TextContent]:
         ]
 
     law_revision_id = arguments["law_revision_id"]
+    if (
+        resolve
+        and not is_law_identifier(law_revision_id)
+        and not is_law_number(law_revision_id)
+    ):
+        # 法令名・略称・読みが渡された場合はその場で法令IDに解決する
+        # （法令ID・法令番号は上流APIがそのまま受け付けるため索引を使わない）
+        resolver = await get_law_resolver()
+        law_id, candidates = resolver.resolve(law_revision_id)
+        if law_id is None:
+            # 索引で決まらない入力はそのまま上流に問い合わせ、
+            # 見つからなかった場合のみ候補を示す
+            try:
+                return await get_law_data(arguments, resolve=False)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in (400, 404):
+                    raise
+            return [TextContent(
+                type="text",
+                text=format_candidates(law_revision_id, candidates),
+            )]
+        contents = await get_law_data({**arguments, "law_revision_id": law_id})
+        note = (
+            f"Resolved: 「{law_revision_id}」→ {law_id}"
+            f"（{candidates[0].law_title}）\n"
+        )
+        # 段階的出力で複数に分かれていても、解決結果は先頭にのみ付ける
+        if not contents:
+            return contents
+        first = TextContent(type="text", text=note + contents[0].text)
+        return [first, *contents[1:]]
+
     content_type = arguments.get("content_type", "full")
     format_type = arguments.get("response_format", "json")
 
-    params = {"response_format": format_type}
+    article = arguments.get("article")
+    if article is not None:
+        article = str(article)
+    progressive = bool(arguments.get("progressive", False))
 
-    # 適切なURLエンコードを使用してクエリ文字列を構築
-    query_string = urllib.parse.urlencode(params)
-    url = f"{BASE_URL}/law_data/{law_revision_id}?{query_string}"
-
-    response = await http_client.get(url)
-    response.raise_for_status()
+    # fields_onlyが指定されている場合はそれを優先、
+    # そうでなければcontent_typeに基づいてフィールドを決定
+    fields_to_extract = arguments.get("fields_only")
+    if not fields_to_extract and content_type != "full":
+        fields_to_extract = get_content_type_fields(content_type, "law_data")
+
+    url = law_data_url(law_revision_id, "json")
+    document = None
+    if format_type == "text":
+        # JSONで取得済みの本文があればmmap上のツリーから直接変換する
+        entry = response_cache.lookup(url, lambda: load_law_document(url))
+        if entry is not None:
+            document = entry.value
+
+    if format_type != "json" and document is None:
+        # textはJSONより小さいXMLを取得して変換する
+        url = law_data_url(law_revision_id, "xml")
+        text = await fetch_xml(url, fields_to_extract, format_type, article)
+        if text is None:
+            return article_not_found(article)
+        debug_info = f"Request URL: {url}\n"
+        if progressive:
+            return await collect_chunks(iter([debug_info, text]), len(text))
+        return [TextContent(type="text", text=debug_info + text)]
 
     debug_info = f"Request URL: {url}\n"
+    if document is None:
+        document = await response_cache.get(
+            url, lambda: load_law_document(url)
+        )
 
-    if format_type == "json":
-        result = response.json()
-        
-        # fields_onlyが指定されている場合はそれを優先、
-        # そうでなければcontent_typeに基づいてフィールドを決定
-        fields_to_extract = arguments.get("fields_only")
-        if not fields_to_extract and content_type != "full":
-            fields_to_extract = get_content_type_fields(
-                content_type, "law_data"
+    index = None
+    if article is not None and document.needs_body(fields_to_extract):
+        if document.tree is not None:
+            index = document.tree.article(article)
+        if index is None:
+            return article_not_found(article)
+
+    if format_type == "text":
+        meta = document.meta
+        if fields_to_extract:
+            meta = extract_fields(meta, fields_to_extract)
+        if progressive:
+            pieces = itertools.chain(
+                [debug_info],
+                document.iter_text(meta, fields_to_extract, index),
             )
-        
-        text = format_response(result, debug_info, fields_to_extract)
-        return [TextContent(type="text", text=text)]
+            return await collect_chunks(pieces, document.size)
+        text = await cpu_executor.run_in_thread(
+            document.size, document.render_text, meta, fields_to_extract, index
+        )
+        return [TextContent(type="text", text=debug_info + text)]
+
+    if progressive:
+        return await collect_chunks(
+            iter_law_document(document, debug_info, fields_to_extract, index),
+            document.size,
+        )
+    text = await cpu_executor.run_in_thread(
+        document.size, render_law_document,
+        document, debug_info, fields_to_extract, index,
+    )
+    return [TextContent(type="text", text=text)]
+
+
+def article_not_found(article: str) -> List[TextContent]:
+    """指定された条が本則にない場合のエラー"""
+    return [TextContent(type="text", text=(
+        f"エラー: 本則に条番号 {article} が見つかりません"
+        f"（例: 第九条の二 は 9_2）"
+    ))]
+
+
+def format_candidates(name: str, candidates: List[LawCandidate]) -> str:
+    """法令名を一意に解決できなかった場合の候補一覧を返す"""
+    if not candidates:
+        return (
+            f"エラー: 「{name}」に該当する法令が見つかりません。\n"
+            f"法令名の一部で探す場合は get_laws の law_title、"
+            f"本文中の語句で探す場合は search_keyword を使用してください"
+        )
+    lines = [
+        f"「{name}」に一致する法令を一意に特定できませんでした。"
+        f"候補（類似度順）:"
+    ]
+    for candidate in candidates:
+        status = "現行" if candidate.current else "非現行"
+        lines.append(
+            f"- {candidate.law_title}（{candidate.law_num}、{status}）"
+            f" law_id: {candidate.law_id} score: {candidate.score}"
+        )
+    lines.append("law_revision_id に候補の law_id を指定して再実行してください")
+    return "\n".join(lines)
+
+
+async def law_stats(arguments: Dict[str, Any]) -> List[TextContent]:
+    """法令一覧のスナップショットに対する集計・期間抽出"""
+    # バリデーション: 有効なパラメータのリスト
+    valid_params = {
+        "group_by", "date_unit", "filters", "date_field", "date_from",
+        "date_to", "within_days", "limit",
+    }
+
+    # 無効なパラメータをチェック
+    invalid_params = set(arguments.keys()) - valid_params
+    if invalid_params:
+        error_msg = (
+            f"エラー: 無効なパラメータが検出されました: {', '.join(invalid_params)}\n\n"
+            f"law_stats で使用可能なパラメータ:\n"
+            f"- group_by: 件数を集計する列\n"
+            f"- date_unit: 日付の列で集計する単位 (year, month, day)\n"
+            f"- filters: 列の値での絞り込み\n"
+            f"- date_field: 期間で絞り込む日付の列\n"
+            f"- date_from / date_to: 期間（YYYY-MM-DD）\n"
+            f"- within_days: 今日からの日数で指定する期間\n"
+            f"- limit: 返す件数の上限\n"
+        )
+        return [TextContent(type="text", text=error_msg)]
+
+    group_by = arguments.get("group_by") or []
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    filters = arguments.get("filters")
+    date_unit = arguments.get("date_unit", "year")
+    date_field = arguments.get("date_field")
+    date_from = arguments.get("date_from")
+    date_to = arguments.get("date_to")
+    limit = arguments.get("limit", 20)
+    within_days = arguments.get("within_days")
+
+    error = None
+    if not isinstance(group_by, list) or not all(
+        isinstance(name, str) for name in group_by
+    ):
+        error = "group_by は列名の配列で指定してください"
+    elif filters is not None and not isinstance(filters, dict):
+        error = (
+            "filters は列名と値（または値の配列）のオブジェクトで指定してください"
+            "（例: {\"law_type\": \"Act\"}）"
+        )
+    elif filters and not all(
+        _is_filter_value(value) for value in filters.values()
+    ):
+        error = "filters の値は文字列・整数、またはそれらの配列で指定してください"
+    elif date_unit not in DATE_UNITS:
+        error = f"date_unit は {', '.join(DATE_UNITS)} のいずれかを指定してください"
+    elif (
+        isinstance(limit, bool) or not isinstance(limit, int)
+        or not 1 <= limit <= 1000
+    ):
+        error = "limit は1〜1000の整数で指定してください"
+    elif within_days is not None and (
+        isinstance(within_days, bool) or not isinstance(within_days, int)
+    ):
+        error = "within_days は整数（日数）で指定してください"
+    if error:
+        return [TextContent(type="text", text=f"エラー: {error}")]
+
+    if within_days is not None:
+        today = datetime.date.today()
+        end = today + datetime.timedelta(days=within_days)
+        date_from, date_to = sorted([today.isoformat(), end.isoformat()])
+    if (date_from or date_to) and not date_field:
+        return [TextContent(type="text", text=(
+            "エラー: 期間を指定する場合は date_field も指定してください"
+        ))]
+
+    snapshot = await get_catalog()
+    try:
+        indices = snapshot.select(filters, date_field, date_from, date_to)
+        groups = (
+            snapshot.group_count(indices, group_by, date_unit)
+            if group_by else None
+        )
+    except ValueError as e:
+        return [TextContent(type="text", text=f"エラー: {str(e)}")]
+
+    result: Dict[str, Any] = {
+        "snapshot": {
+            "law_count": len(snapshot),
+            "loaded_at": datetime.datetime.fromtimestamp(
+                snapshot.loaded_at
+            ).isoformat(timespec="seconds"),
+            "updated_through": snapshot.updated_through(),
+        },
+        "total_count": len(indices),
+    }
+    if groups is not None:
+        result["group_count"] = len(groups)
+        result["groups"] = [
+            {**dict(zip(group_by, key)), "count": count}
+            for key, count in groups[:limit]
+        ]
     else:
-        return [TextContent(type="text", text=debug_info + response.text)]
+        if date_field:
+            # 期間で絞り込んだ場合は日付順に並べる
+            dates = snapshot.dates[date_field]
+            indices = sorted(indices, key=dates.__getitem__)
+        columns = ["law_id", "law_title", "law_type", "category"]
+        if date_field:
+            columns.append(date_field)
+        result["laws"] = []
+        for index in indices[:limit]:
+            row = snapshot.row(index)
+            result["laws"].append({name: row[name] for name in columns})
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    return [TextContent(type="text", text=text)]
+
+
+def _is_filter_value(value: Any) -> bool:
+    """law_stats の絞り込み値（文字列・整数、またはその配列）かどうか"""
+    values = value if isinstance(value, list) else [value]
+    return all(
+        isinstance(item, (str, int)) and not isinstance(item, bool)
+        for item in values
+    )
+
+
+async def get_law_resolver() -> LawResolver:
+    """名前索引を返す（未構築の場合は法令一覧を取得して構築する）"""
+    if not law_resolver.loaded:
+        await refresh_catalog()
+    return law_resolver
+
+
+async def get_catalog() -> CatalogSnapshot:
+    """法令一覧のスナップショットを返す（未構築の場合は取得して構築する）"""
+    if catalog is None:
+        await refresh_catalog()
+    assert catalog is not None
+    return catalog
+
+
+async def refresh_catalog() -> None:
+    """法令一覧のスナップショットと名前索引を更新する（同時実行は1回にまとめる）
+
+    構築は呼び出し元のタイムアウトやキャンセルでは中断せず、取得途中の
+    ページを無駄にしないよう最後まで実行して後続の呼び出しで利用する。
+    """
+    await single_flight.run("catalog", _refresh_catalog, detach=True)
+
+
+async def _refresh_catalog() -> None:
+    global catalog, law_resolver
+    if catalog is None:
+        laws = await load_catalog_laws()
+        snapshot = await cpu_executor.run_in_thread(
+            cpu_executor.threshold, CatalogSnapshot.build, laws
+        )
+    else:
+        # 前回の最新更新日以降に更新された法令のみを取得して差し替える
+        laws = await load_catalog_laws(catalog.updated_through())
+        snapshot = await cpu_executor.run_in_thread(
+            cpu_executor.threshold, catalog.merge, laws
+        )
+    resolver = await cpu_executor.run_in_thread(
+        cpu_executor.threshold, LawResolver.build, snapshot
+    )
+    # 構築済みの索引とスナップショットをイベントループ上でまとめて差し替える
+    law_resolver = resolver
+    catalog = snapshot
+
+
+async def refresh_loaded_catalog() -> None:
+    """構築済みのスナップショットと名前索引のみを定期的に更新する"""
+    if catalog is not None:
+        await refresh_catalog()
+
+
+async def load_catalog_laws(
+    updated_from: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """法令一覧取得APIをページングして全法令（または更新分）を取得する"""
+    laws: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        params: Dict[str, Any] = {"limit": CATALOG_PAGE_SIZE, "offset": offset}
+        if updated_from:
+            params["updated_from"] = updated_from
+        query_string = urllib.parse.urlencode(params)
+        response = await download(f"{BASE_URL}/laws?{query_string}")
+        data = await cpu_executor.run(
+            len(response.content), json.loads, response.content
+        )
+        page = data.get("laws") or []
+        laws.extend(page)
+        offset += len(page)
+        total_count = data.get("total_count") or 0
+        await report_progress(
+            offset / total_count if total_count else 0.0,
+            f"法令一覧を取得中（{offset}/{total_count}件）",
+        )
+        if not page or offset >= data.get("total_count", 0):
+            return laws
+
+
+def law_data_url(law_revision_id: str, format_type: str) -> str:
+    """法令本文取得APIのURLを組み立てる"""
+    # 適切なURLエンコードを使用してクエリ文字列を構築
+    query_string = urllib.parse.urlencode({"response_format": format_type})
+    return f"{BASE_URL}/law_data/{law_revision_id}?{query_string}"
+
+
+async def load_law_document(url: str) -> LawDocument:
+    """法令本文を取得し、本文ツリーをコンパクト形式で保存する"""
+    response = await download(url, DOWNLOAD_PROGRESS)
+    size = len(response.content)
+    await report_progress(DOWNLOAD_PROGRESS, "本文を解析中", force=True)
+    meta, encoded = await cpu_executor.run(
+        size, parse_law_document, response.content
+    )
+    tree = None
+    if encoded is not None:
+        # 書き出しとmmapもイベントループ外で行う
+        tree = await cpu_executor.run_in_thread(
+            len(encoded), law_tree_store.save, url, encoded
+        )
+    await report_progress(PARSE_PROGRESS, "本文を整形中", force=True)
+    return LawDocument(meta, tree, size)
+
+
+def render_law_document(
+    document: LawDocument,
+    debug_info: str,
+    fields_only: Optional[List[str]],
+    index: Optional[int],
+) -> str:
+    """法令本文をJSON文字列に整形する"""
+    result = document.to_dict(fields_only, index)
+    return format_response(result, debug_info, fields_only)
+
+
+def iter_law_document(
+    document: LawDocument,
+    debug_info: str,
+    fields_only: Optional[List[str]],
+    index: Optional[int],
+) -> Iterator[str]:
+    """render_law_document と同じJSON文字列を、全体を連結せずに少しずつ返す"""
+    result = document.to_dict(fields_only, index)
+    if fields_only:
+        result = extract_fields(result, fields_only)
+    yield debug_info
+    yield from json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(result)
+
+
+async def collect_chunks(pieces: Iterator[str], size: int) -> List[TextContent]:
+    """細切れのテキストを条の区切りで分割し、チャンクごとの TextContent にする
+
+    生成器はプールのスレッドで数チャンクずつ進め、その都度進捗を通知する。
+    """
+    chunks = iter_chunks(pieces, PROGRESSIVE_CHUNK_CHARS)
+    contents: List[TextContent] = []
+    emitted = 0
+    while True:
+        batch = await cpu_executor.run_in_thread(
+            size, list, itertools.islice(chunks, 4)
+        )
+        if not batch:
+            break
+        for chunk in batch:
+            contents.append(TextContent(type="text", text=chunk))
+            emitted += len(chunk)
+        await report_progress(
+            PARSE_PROGRESS
+            + (1 - PARSE_PROGRESS) * min(1.0, emitted / max(size, 1)),
+            f"{len(contents)}チャンクを整形済み",
+        )
+    await report_progress(1.0, f"{len(contents)}チャンクを整形済み", force=True)
+    return contents
 
 
 async def get_law_revisions(arguments: Dict[str, Any]) -> List[TextContent]:
@@ -705,18 +1521,18 @@ async def get_law_revisions(arguments: Dict[str, Any]) -> List[TextContent]:
     url = f"{BASE_URL}/law_revisions/{law_id}"
     debug_info = f"Request URL: {url}\n"
 
-    response = await http_client.get(url)
-    response.raise_for_status()
+    response = await fetch(url)
 
-    result = response.json()
-    
     # content_typeとfields_onlyの処理
     content_type = arguments.get("content_type", "full")
     fields_to_extract = arguments.get("fields_only")
     if not fields_to_extract and content_type != "full":
         fields_to_extract = get_content_type_fields(content_type, "revisions")
     
-    text = format_response(result, debug_info, fields_to_extract)
+    text = await cpu_executor.run(
+        len(response.content), render_json, response.content,
+        debug_info, fields_to_extract,
+    )
     return [TextContent(type="text", text=text)]
 
 
@@ -734,6 +1550,8 @@ async def search_keyword(arguments: Dict[str, Any]) -> List[TextContent]:
         "offset",
         "limit",
         "fields_only",
+        "progressive",
+        "max_pages",
     }
 
     # 無効なパラメータをチェック
@@ -751,9 +1569,11 @@ async def search_keyword(arguments: Dict[str, Any]) -> List[TextContent]:
             f"- category: 法令分類\n"
             f"- content_type: 取得する内容タイプ (full, title_only, "
             f"summary, basic_info)\n"
-            f"- response_format: 取得フォーマット (json, xml)（デフォルト: json）\n"
+            f"- response_format: 取得フォーマット (json, xml, text)（デフォルト: json）\n"
             f"- offset: 取得開始位置（デフォルト: 0）\n"
-            f"- limit: 取得数（デフォルト: 100、最大: 500）\n\n"
+            f"- limit: 取得数（デフォルト: 100、最大: 500）\n"
+            f"- progressive: 続きのページも取得してページごとに返す（json のみ）\n"
+            f"- max_pages: progressive 指定時の最大ページ数（デフォルト: 10）\n\n"
             f"※法令名で検索する場合は get_laws を使用してください。"
         )
         return [TextContent(type="text", text=error_msg)]
@@ -774,8 +1594,12 @@ async def search_keyword(arguments: Dict[str, Any]) -> List[TextContent]:
         params["category"] = arguments["category"]
     if "content_type" in arguments:
         params["content_type"] = arguments["content_type"]
+    format_type = arguments.get("response_format", "json")
     if "response_format" in arguments:
-        params["response_format"] = arguments["response_format"]
+        # textはJSONより小さいXMLを取得して変換する
+        params["response_format"] = (
+            "xml" if format_type == "text" else format_type
+        )
     if "offset" in arguments:
         params["offset"] = arguments["offset"]
     if "limit" in arguments:
@@ -786,29 +1610,201 @@ async def search_keyword(arguments: Dict[str, Any]) -> List[TextContent]:
     # 適切なURLエンコードを使用してクエリ文字列を構築
     query_string = urllib.parse.urlencode(params)
     url = f"{BASE_URL}/keyword?{query_string}"
+    debug_info = f"Request URL: {url}\n"
 
-    response = await http_client.get(url)
-    response.raise_for_status()
+    # content_typeとfields_onlyの処理
+    content_type = arguments.get("content_type", "full")
+    fields_to_extract = arguments.get("fields_only")
+    if not fields_to_extract and content_type != "full":
+        fields_to_extract = get_content_type_fields(
+            content_type, "keyword_search"
+        )
 
-    debug_info = f"Request URL: {url}\n"
+    if format_type != "json":
+        text = await fetch_xml(url, fields_to_extract, format_type)
+        return [TextContent(type="text", text=debug_info + text)]
 
-    format_type = arguments.get("response_format", "json")
-    
-    if format_type == "json":
-        result = response.json()
-        
-        # content_typeとfields_onlyの処理
-        content_type = arguments.get("content_type", "full")
-        fields_to_extract = arguments.get("fields_only")
-        if not fields_to_extract and content_type != "full":
-            fields_to_extract = get_content_type_fields(
-                content_type, "keyword_search"
-            )
-        
-        text = format_response(result, debug_info, fields_to_extract)
-        return [TextContent(type="text", text=text)]
-    else:
-        return [TextContent(type="text", text=debug_info + response.text)]
+    if arguments.get("progressive"):
+        return await search_keyword_pages(
+            params, fields_to_extract, arguments.get("max_pages", 10)
+        )
+
+    response = await fetch(url)
+
+    text = await cpu_executor.run(
+        len(response.content), render_json, response.content,
+        debug_info, fields_to_extract,
+    )
+    return [TextContent(type="text", text=text)]
+
+
+async def search_keyword_pages(
+    params: Dict[str, Any], fields_only: Optional[List[str]], max_pages: int
+) -> List[TextContent]:
+    """next_offset をたどってキーワード検索の結果を取得し、ページごとに返す"""
+    contents: List[TextContent] = []
+    offset = int(params.get("offset", 0))
+    for page in range(max_pages):
+        query_string = urllib.parse.urlencode({**params, "offset": offset})
+        url = f"{BASE_URL}/keyword?{query_string}"
+        response = await fetch(url)
+        size = len(response.content)
+        data = await cpu_executor.run(size, json.loads, response.content)
+        text = await cpu_executor.run(
+            size, format_response, data, f"Request URL: {url}\n", fields_only
+        )
+        contents.append(TextContent(type="text", text=text))
+
+        next_offset = data.get("next_offset")
+        total_count = data.get("total_count") or 0
+        done = not next_offset or next_offset <= offset or (
+            next_offset >= total_count
+        )
+        await report_progress(
+            1.0 if done else (page + 1) / max_pages,
+            f"{page + 1}ページ目を取得（{next_offset or total_count}/{total_count}件）",
+            force=done,
+        )
+        if done:
+            break
+        offset = next_offset
+    return contents
+
+
+async def fetch_xml(
+    url: str,
+    fields_only: Optional[List[str]],
+    format_type: str,
+    article: Optional[str] = None,
+) -> Optional[str]:
+    """XMLレスポンスをストリーミングしながら逐次解析する
+
+    抽出もテキスト変換も不要な場合は解析せずにそのまま返す。
+    本文を対象に条を指定し、その条が本則にない場合はNoneを返す。
+    """
+    if format_type == "xml" and not fields_only and article is None:
+        response = await fetch(url)
+        return response.text
+
+    projector = XmlProjector(fields_only, render=format_type, article=article)
+    cached = response_cache.lookup(url, lambda: download(url))
+    if cached is not None:
+        content = cached.value.content
+        text = await cpu_executor.run_in_thread(
+            len(content), project_xml, projector, content
+        )
+        return None if projector.article_missing else text
+
+    # 解析しながら受信し、受信完了後に本文をキャッシュへ保存する
+    chunks = []
+    async with get_http_client().stream("GET", url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            projector.feed(chunk)
+    response_cache.put(
+        url, buffered_response(response, chunks), lambda: download(url)
+    )
+    text = projector.close()
+    return None if projector.article_missing else text
+
+
+def buffered_response(
+    response: httpx.Response, chunks: List[bytes]
+) -> httpx.Response:
+    """ストリーミングで受信した（復号済みの）本文からレスポンスを作り直す"""
+    # 本文は復号済みのため、圧縮方式と圧縮後の長さのヘッダーは除く
+    headers = [
+        (name, value) for name, value in response.headers.multi_items()
+        if name.lower() not in ("content-encoding", "content-length")
+    ]
+    return httpx.Response(
+        response.status_code,
+        headers=headers,
+        content=b"".join(chunks),
+        request=response.request,
+    )
+
+
+def project_xml(projector: XmlProjector, content: bytes) -> str:
+    """取得済みのXMLをチャンク単位で逐次解析する"""
+    for start in range(0, len(content), XML_CHUNK_SIZE):
+        projector.feed(content[start:start + XML_CHUNK_SIZE])
+    return projector.close()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """共有HTTPクライアントを返す（初回呼び出し時に生成する）"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=30.0,
+            transport=create_transport(RECORD_PATH, REPLAY_PATH, REPLAY_TIMING),
+        )
+    return _http_client
+
+
+async def fetch(url: str) -> httpx.Response:
+    """上流APIからレスポンスを取得する（キャッシュ経由）"""
+    return await response_cache.get(url, lambda: download(url))
+
+
+async def download(url: str, progress: float = 0.0) -> httpx.Response:
+    """上流APIからレスポンスを取得する
+
+    progress を指定し、呼び出し元が進捗通知を求めている場合は、受信量を
+    0〜progress の進捗として通知しながらストリーミングで受信する。
+    """
+    if not progress or current_progress.get() is None:
+        response = await get_http_client().get(url)
+        response.raise_for_status()
+        return response
+
+    chunks = []
+    async with get_http_client().stream("GET", url) as response:
+        response.raise_for_status()
+        total = int(response.headers.get("content-length") or 0)
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            if total:
+                received = response.num_bytes_downloaded
+                await report_progress(
+                    progress * min(1.0, received / total),
+                    f"本文を受信中（{received}/{total}バイト）",
+                )
+    return buffered_response(response, chunks)
+
+
+def cache_loader(url: str) -> Optional[Loader]:
+    """URLに対応するキャッシュ用ローダーを返す（キャッシュしないURLはNone）"""
+    if not url.startswith(BASE_URL + "/"):
+        return None
+    parsed = urllib.parse.urlsplit(url)
+    endpoint = parsed.path[len(urllib.parse.urlsplit(BASE_URL).path):]
+    query = urllib.parse.parse_qs(parsed.query)
+    if endpoint.startswith("/law_data/"):
+        if query.get("response_format") == ["json"]:
+            return lambda: load_law_document(url)
+        return lambda: download(url)
+    if endpoint == "/laws" and query.get("limit") == [str(CATALOG_PAGE_SIZE)]:
+        # 索引構築用の一覧ページはキャッシュしない
+        return None
+    if endpoint in ("/laws", "/keyword") or endpoint.startswith("/law_revisions/"):
+        return lambda: download(url)
+    return None
+
+
+async def warm_cache(path: str) -> None:
+    """記録ファイルに含まれるリクエストを取得してキャッシュを温める
+
+    直近に記録されたものからキャッシュの上限件数までを対象とし、
+    上流への同時リクエスト数は再検証と同じ上限に従う。
+    """
+    urls = [url for url in recorded_urls(path) if cache_loader(url)]
+    urls = urls[-response_cache.max_entries:]
+    await asyncio.gather(*[
+        response_cache.revalidate(url, cache_loader(url)) for url in urls
+    ])
 
 
 async def get_attachment(arguments: Dict[str, Any]) -> List[TextContent]:
@@ -837,28 +1833,128 @@ async def get_attachment(arguments: Dict[str, Any]) -> List[TextContent]:
     law_revision_id = arguments["law_revision_id"]
     src = arguments["src"]
 
-    params = {"src": src}
-
-    # 適切なURLエンコードを使用してクエリ文字列を構築
-    query_string = urllib.parse.urlencode(params)
-    url = f"{BASE_URL}/attachment/{law_revision_id}?{query_string}"
-
-    response = await http_client.get(url)
-    response.raise_for_status()
-
+    url = attachment_url(law_revision_id, src)
     debug_info = f"Request URL: {url}\n"
 
+    stored = attachment_store.lookup(law_revision_id, src)
+    if stored is not None:
+        # prefetch_attachments で保存済みのファイルは上流に問い合わせない
+        debug_info += f"Stored: {stored.path}\n"
+        content_type = stored.content_type
+        content = await cpu_executor.run_in_thread(stored.size, stored.read)
+        body = content.decode("utf-8", errors="replace")
+    else:
+        response = await get_http_client().get(url)
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        content = response.content
+        body = response.text
+
     # バイナリデータの場合は、その旨を返却
-    content_type = response.headers.get("content-type", "")
     if any(t in content_type for t in ["image", "pdf", "octet-stream"]):
         text = (
             debug_info + f"バイナリデータを取得しました。"
             f"コンテンツタイプ: {content_type}, "
-            f"サイズ: {len(response.content)} bytes"
+            f"サイズ: {len(content)} bytes"
         )
         return [TextContent(type="text", text=text)]
     else:
-        return [TextContent(type="text", text=debug_info + response.text)]
+        return [TextContent(type="text", text=debug_info + body)]
+
+
+def attachment_url(law_revision_id: str, src: str) -> str:
+    """添付ファイル取得APIのURLを組み立てる"""
+    # 適切なURLエンコードを使用してクエリ文字列を構築
+    query_string = urllib.parse.urlencode({"src": src})
+    return f"{BASE_URL}/attachment/{law_revision_id}?{query_string}"
+
+
+async def prefetch_attachments(arguments: Dict[str, Any]) -> List[TextContent]:
+    """法令本文の attached_files_info に載っている添付ファイルを一括取得する"""
+    # バリデーション: 有効なパラメータのリスト
+    valid_params = {"law_revision_id"}
+
+    # 無効なパラメータをチェック
+    invalid_params = set(arguments.keys()) - valid_params
+    if invalid_params:
+        error_msg = (
+            f"エラー: 無効なパラメータが検出されました: {', '.join(invalid_params)}\n\n"
+            f"prefetch_attachments で使用可能なパラメータ:\n"
+            f"- law_revision_id: 法令ID/番号/履歴ID（必須）\n"
+        )
+        return [TextContent(type="text", text=error_msg)]
+
+    if "law_revision_id" not in arguments:
+        error_text = "エラー: law_revision_id パラメータは必須です"
+        return [TextContent(type="text", text=error_text)]
+
+    law_revision_id = arguments["law_revision_id"]
+    url = law_data_url(law_revision_id, "json")
+    document = await response_cache.get(url, lambda: load_law_document(url))
+    attached_files_info = document.meta.get("attached_files_info") or {}
+    files = attached_files_info.get("attached_files") or []
+
+    semaphore = asyncio.Semaphore(ATTACHMENT_CONCURRENCY)
+
+    async def prefetch(file: Dict[str, Any]) -> Dict[str, Any]:
+        revision_id = file.get("law_revision_id") or law_revision_id
+        src = file.get("src") or ""
+        updated = file.get("updated") or ""
+        async with semaphore:
+            try:
+                stored, fetched = await store_attachment(revision_id, src, updated)
+            except Exception as e:
+                return {
+                    "law_revision_id": revision_id, "src": src,
+                    "updated": updated, "status": "error",
+                    "error": str(e).splitlines()[0],
+                }
+        return {**stored.to_dict(), "status": "fetched" if fetched else "stored"}
+
+    results = await asyncio.gather(*[prefetch(file) for file in files])
+    statuses = [result["status"] for result in results]
+    manifest = {
+        "law_revision_id": law_revision_id,
+        "count": len(results),
+        "fetched": statuses.count("fetched"),
+        "stored": statuses.count("stored"),
+        "failed": statuses.count("error"),
+        "attached_files": results,
+    }
+    text = f"Request URL: {url}\n" + json.dumps(
+        manifest, ensure_ascii=False, indent=2
+    )
+    return [TextContent(type="text", text=text)]
+
+
+async def store_attachment(
+    law_revision_id: str, src: str, updated: str
+) -> Tuple[StoredAttachment, bool]:
+    """添付ファイルを保存済みでなければ取得して保存する
+
+    (保存済みの添付ファイル, 今回取得したかどうか) を返す。
+    同じファイルの同時取得は1回にまとめる。
+    """
+    stored = attachment_store.get(law_revision_id, src, updated)
+    if stored is not None:
+        return stored, False
+    stored = await single_flight.run(
+        ("attachment", law_revision_id, src, updated),
+        lambda: download_attachment(law_revision_id, src, updated),
+    )
+    return stored, True
+
+
+async def download_attachment(
+    law_revision_id: str, src: str, updated: str
+) -> StoredAttachment:
+    """添付ファイルを上流から取得して保存する"""
+    response = await download(attachment_url(law_revision_id, src))
+    content = response.content
+    return await cpu_executor.run_in_thread(
+        len(content), attachment_store.save, law_revision_id, src, updated,
+        response.headers.get("content-type", ""), content,
+    )
 
 
 async def get_law_file(arguments: Dict[str, Any]) -> List[TextContent]:
@@ -893,7 +1989,7 @@ async def get_law_file(arguments: Dict[str, Any]) -> List[TextContent]:
     # 新しいエンドポイント形式: /law_file/{file_type}/{law_id_or_num_or_revision_id}
     url = f"{BASE_URL}/law_file/{file_type}/{law_revision_id}"
 
-    response = await http_client.get(url)
+    response = await get_http_client().get(url)
     response.raise_for_status()
 
     debug_info = f"Request URL: {url}\n"
@@ -913,18 +2009,54 @@ async def get_law_file(arguments: Dict[str, Any]) -> List[TextContent]:
 
 async def main():
     """メイン関数"""
+    warm_task: Optional["asyncio.Future[None]"] = None
     try:
         # 標準入出力を使用してMCPプロトコルで通信
         from mcp.server.stdio import stdio_server
 
+        refresh_scheduler.add_job(
+            refresh_loaded_catalog,
+            float(os.environ.get("EGOV_MCP_CATALOG_REFRESH_INTERVAL", "86400")),
+        )
+        refresh_scheduler.start()
+        if WARM_PATH:
+            warm_task = asyncio.ensure_future(warm_cache(WARM_PATH))
         async with stdio_server() as (read_stream, write_stream):
             init_options = app.create_initialization_options()
             await app.run(read_stream, write_stream, init_options)
     except KeyboardInterrupt:
         pass
     finally:
-        await http_client.aclose()
+        log_metrics()
+        if warm_task is not None:
+            warm_task.cancel()
+            await asyncio.gather(warm_task, return_exceptions=True)
+        await refresh_scheduler.aclose()
+        pending = single_flight.tasks()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        law_tree_store.close()
+        cpu_executor.shutdown()
+        if _http_client is not None:
+            await _http_client.aclose()
+
+
+def log_metrics() -> None:
+    """ツール呼び出しと中断された上流取得の件数を標準エラーへ出力する"""
+    counts = dict(metrics)
+    counts["upstream_cancelled"] = (
+        response_cache.inflight.cancelled + single_flight.cancelled
+    )
+    if metrics["tool_calls"]:
+        summary = " ".join(f"{key}={value}" for key, value in counts.items())
+        print(f"egov-mcp metrics: {summary}", file=sys.stderr)
 
 
-if __name__ == "__main__":
+def run() -> None:
+    """コンソールスクリプト用のエントリポイント"""
     asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
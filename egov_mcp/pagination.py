@@ -0,0 +1,157 @@
+# 出力サイズ上限と継続カーソルによるページング
+import base64
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+# 切り詰め位置の候補（優先度の高い順）
+# JSON（indent=2）の法令ツリーとXMLの双方で条・項・号の開始位置を検出する
+_STRUCTURAL_BOUNDARIES = [
+    re.compile(
+        r'\n[ \t]*(?:\{\n[ \t]*"tag": "%s"|<%s[ >/])' % (tag, tag)
+    )
+    for tag in ("Article", "Paragraph", "Item")
+]
+# テキスト形式では「第九条の二 …」で始まる行を条の開始位置とする
+_NUMERALS = "〇一二三四五六七八九十百千"
+_STRUCTURAL_BOUNDARIES.insert(1, re.compile(
+    r"\n(?=第[%s]+条(?:の[%s]+)*[ 　])" % (_NUMERALS, _NUMERALS)
+))
+# 文末（句点）の直後
+_SENTENCE_BOUNDARY = re.compile(r"。")
+# 行末
+_LINE_BOUNDARY = re.compile(r"\n")
+
+# 保持するページング対象テキストの合計文字数の上限と保持期間（秒）
+PAGE_STORE_MAX_CHARS = 8_000_000
+PAGE_STORE_TTL = 1800.0
+
+
+class PageStore:
+    """継続ページ用にレンダリング済みテキストを保持するLRUストア
+
+    保持するテキストの合計文字数が上限を超えると古いものから破棄し、
+    保持期間を過ぎたものは参照時・追加時に破棄する。
+    """
+
+    def __init__(
+        self, max_chars: int = PAGE_STORE_MAX_CHARS, ttl: float = PAGE_STORE_TTL
+    ):
+        self.max_chars = max_chars
+        self.ttl = ttl
+        # キー → (テキスト, 保存時刻)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._chars = 0
+
+    def put(self, text: str) -> Optional[str]:
+        """テキストを保存してキーを返す
+
+        必要なら古いものを破棄して空きを作る。テキスト単体で上限を超える
+        場合は保存せずNoneを返す。
+        """
+        self._expire()
+        if len(text) > self.max_chars:
+            return None
+        while self._entries and self._chars + len(text) > self.max_chars:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._chars -= len(evicted)
+        key = uuid.uuid4().hex[:16]
+        self._entries[key] = (text, time.monotonic())
+        self._chars += len(text)
+        return key
+
+    def get(self, key: str) -> Optional[str]:
+        """キーに対応するテキストを返す（存在しなければNone）"""
+        self._expire()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _expire(self) -> None:
+        # 参照順に並ぶため、保存時刻を見て全件を確認する
+        deadline = time.monotonic() - self.ttl
+        for key, (text, stored_at) in list(self._entries.items()):
+            if stored_at < deadline:
+                del self._entries[key]
+                self._chars -= len(text)
+
+
+def encode_cursor(key: str, offset: int) -> str:
+    """継続カーソルを生成する"""
+    raw = f"{key}:{offset}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """継続カーソルを (キー, オフセット) に分解する"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        key, offset = raw.split(":", 1)
+        return key, int(offset)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"不正なカーソルです: {cursor}") from e
+
+
+def find_cut(text: str, start: int, max_chars: int) -> int:
+    """start から max_chars 以内で、構造上の区切りに最も近い切断位置を返す"""
+    end = start + max_chars
+    if end >= len(text):
+        return len(text)
+
+    # ページが極端に短くならないよう、後半分の範囲にある区切りのみ採用する
+    floor = start + max_chars // 2
+    for pattern in _STRUCTURAL_BOUNDARIES:
+        cut = _last_match(pattern, text, floor, end, at_start=True)
+        if cut is not None:
+            return cut
+
+    cut = _last_match(_SENTENCE_BOUNDARY, text, floor, end, at_start=False)
+    if cut is not None:
+        return cut
+    cut = _last_match(_LINE_BOUNDARY, text, floor, end, at_start=False)
+    if cut is not None:
+        return cut
+    return end
+
+
+def iter_chunks(pieces: Iterable[str], chunk_chars: int) -> Iterator[str]:
+    """細切れのテキストをまとめ、構造上の区切りで chunk_chars 程度ずつ返す
+
+    JSONEncoder.iterencode の出力などを受け取り、全体を1つの文字列に
+    連結せずに分割する。
+    """
+    parts = []
+    size = 0
+    for piece in pieces:
+        parts.append(piece)
+        size += len(piece)
+        if size <= chunk_chars:
+            continue
+        buffer = "".join(parts)
+        start = 0
+        while len(buffer) - start > chunk_chars:
+            cut = find_cut(buffer, start, chunk_chars)
+            yield buffer[start:cut]
+            start = cut
+        parts = [buffer[start:]]
+        size = len(parts[0])
+    if size:
+        yield "".join(parts)
+
+
+def _last_match(
+    pattern: "re.Pattern[str]", text: str, floor: int, end: int, at_start: bool
+) -> Optional[int]:
+    """[floor, end) 内で最後に一致した区切り位置を返す"""
+    position = None
+    for match in pattern.finditer(text, floor, end):
+        candidate = match.start() if at_start else match.end()
+        if floor < candidate <= end:
+            position = candidate
+    return position
@@ -0,0 +1,73 @@
+# ツール呼び出しの進捗通知（MCPの notifications/progress）
+import contextvars
+import time
+from typing import Any, Optional, Union
+
+# 通知の最短間隔（秒）
+MIN_INTERVAL = 0.1
+
+
+class ProgressReporter:
+    """クライアントが progressToken を指定したツール呼び出しの進捗を通知する
+
+    進捗は0〜1の割合で、値が戻らないよう単調増加させる。頻繁な通知は
+    最短間隔で間引き、呼び出しの終了後（close後）は何も送らない。
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        token: Union[str, int],
+        request_id: Optional[str] = None,
+        min_interval: float = MIN_INTERVAL,
+    ):
+        self.session = session
+        self.token = token
+        self.request_id = request_id
+        self.min_interval = min_interval
+        self.closed = False
+        self._progress = 0.0
+        self._message: Optional[str] = None
+        self._sent_at = 0.0
+
+    async def report(
+        self, progress: float, message: Optional[str] = None, force: bool = False
+    ) -> None:
+        """進捗を通知する（force=False の場合は間引かれることがある）"""
+        if self.closed:
+            return
+        progress = min(1.0, max(self._progress, progress))
+        if self._sent_at and (progress, message) == (self._progress, self._message):
+            return
+        now = time.monotonic()
+        if not force and now - self._sent_at < self.min_interval:
+            return
+        self._progress = progress
+        self._message = message
+        self._sent_at = now
+        try:
+            await self.session.send_progress_notification(
+                self.token, progress, 1.0, message,
+                related_request_id=self.request_id,
+            )
+        except Exception:
+            # 通知の失敗でツールの処理自体を止めない
+            self.closed = True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+# 実行中のツール呼び出しの進捗通知先（指定がなければNone）
+current_progress: contextvars.ContextVar[Optional[ProgressReporter]] = (
+    contextvars.ContextVar("egov_mcp_progress", default=None)
+)
+
+
+async def report_progress(
+    progress: float, message: Optional[str] = None, force: bool = False
+) -> None:
+    """実行中のツール呼び出しに進捗を通知する（通知先がなければ何もしない）"""
+    reporter = current_progress.get()
+    if reporter is not None:
+        await reporter.report(progress, message, force)
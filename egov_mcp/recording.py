@@ -0,0 +1,174 @@
+# 上流APIとの通信の記録・再生（httpxのトランスポートとして差し替える）
+#
+# 記録ファイルは1リクエストごとにgzipメンバーを追記した JSON Lines 形式。
+# gzip.open で連結されたメンバーをまとめて読み出せる。
+import asyncio
+import base64
+import concurrent.futures
+import gzip
+import json
+import sys
+import time
+from collections import deque
+from typing import (
+    Any, AsyncIterator, BinaryIO, Callable, Deque, Dict, Iterator, List,
+    Optional, Tuple,
+)
+
+import httpx
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """記録ファイルのレコードを順に返す"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def recorded_urls(path: str, method: str = "GET") -> List[str]:
+    """正常応答だったリクエストのURLを記録順・重複なしで返す"""
+    urls: Dict[str, None] = {}
+    for record in read_records(path):
+        if record["method"] == method and 200 <= record["status"] < 300:
+            urls.setdefault(record["url"], None)
+    return list(urls)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """実際の通信を行いつつ、リクエストとレスポンスを記録ファイルへ追記する
+
+    本文は呼び出し元へそのまま流しながら控えておき、最後まで受信できた
+    レスポンスのみを記録する。圧縮・書き込みは専用のスレッド1本で記録順に
+    行い、イベントループを止めない。
+    """
+
+    def __init__(
+        self, path: str, transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.path = path
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._writer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="egov-mcp-record"
+        )
+        self._file: Optional[BinaryIO] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started_at = time.time()
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+
+        def record(body: bytes) -> None:
+            self._writer.submit(self._append, {
+                "started_at": started_at,
+                "elapsed": time.perf_counter() - started,
+                "method": request.method,
+                "url": str(request.url),
+                "status": response.status_code,
+                "headers": response.headers.multi_items(),
+                "body": body,
+            })
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_TeeStream(response.stream, record),
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+        # 書き込み待ちの記録を書き終えてからファイルを閉じる
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._writer.shutdown, True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """記録を1つのgzipメンバーとして追記する（書き込み用スレッドで実行）"""
+        record["body"] = base64.b64encode(record["body"]).decode("ascii")
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+            self._file.write(gzip.compress(line.encode("utf-8")))
+            self._file.flush()
+        except OSError as e:
+            print(f"通信の記録に失敗しました: {e}", file=sys.stderr)
+
+
+class _TeeStream(httpx.AsyncByteStream):
+    """受信したチャンクを呼び出し元へ渡しつつ控え、最後まで読めたら記録する"""
+
+    def __init__(
+        self, stream: httpx.AsyncByteStream, record: Callable[[bytes], None]
+    ):
+        self._stream = stream
+        self._record = record
+        self._chunks: List[bytes] = []
+        self._complete = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        # 圧縮されたままの本文を記録し、再生時も同じ形で返す
+        async for chunk in self._stream:
+            self._chunks.append(chunk)
+            yield chunk
+        self._complete = True
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._complete:
+                self._record(b"".join(self._chunks))
+            self._chunks = []
+            self._complete = False
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """記録ファイルからレスポンスを返す（上流には接続しない）
+
+    同じリクエストが複数回記録されている場合は記録順に返し、使い切った後は
+    最後のレスポンスを返し続ける。timing_scale は記録時の所要時間に掛ける
+    倍率で、1.0 で記録どおり、0 で待ち時間なしとなる。
+    """
+
+    def __init__(self, path: str, timing_scale: float = 1.0):
+        self.path = path
+        self.timing_scale = timing_scale
+        self._records: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = {}
+        for record in read_records(path):
+            key = (record["method"], record["url"])
+            self._records.setdefault(key, deque()).append(record)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        queue = self._records.get((request.method, str(request.url)))
+        if not queue:
+            raise httpx.ConnectError(
+                f"記録にないリクエストです: {request.method} {request.url}",
+                request=request,
+            )
+        record = queue.popleft() if len(queue) > 1 else queue[0]
+        if self.timing_scale > 0:
+            await asyncio.sleep(record["elapsed"] * self.timing_scale)
+        return httpx.Response(
+            record["status"],
+            headers=record["headers"],
+            stream=httpx.ByteStream(base64.b64decode(record["body"])),
+            request=request,
+        )
+
+
+def create_transport(
+    record_path: Optional[str] = None,
+    replay_path: Optional[str] = None,
+    timing_scale: float = 1.0,
+) -> Optional[httpx.AsyncBaseTransport]:
+    """設定に応じたトランスポートを返す（どちらも未指定ならNone）"""
+    if replay_path:
+        return ReplayTransport(replay_path, timing_scale)
+    if record_path:
+        return RecordingTransport(record_path)
+    return None
@@ -0,0 +1,190 @@
+# 法令名・略称・読み・法令番号から法令IDへの解決
+import bisect
+import difflib
+import re
+import time
+import unicodedata
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from egov_mcp.catalog import CatalogSnapshot
+
+# 法令ID・法令履歴ID（英数字とアンダースコアのみ）
+_IDENTIFIER_PATTERN = re.compile(r"^[0-9A-Za-z_]+$")
+# 法令番号（例: 平成十一年法律第百二十七号）。上流APIがそのまま受け付ける
+_NUMBER = "[元〇一二三四五六七八九十百千0-9０-９]+"
+_LAW_NUMBER_PATTERN = re.compile(
+    r"^(?:明治|大正|昭和|平成|令和)%s年\S*?第%s号$" % (_NUMBER, _NUMBER)
+)
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+# 候補として返す件数
+MAX_CANDIDATES = 5
+
+
+def is_law_identifier(value: str) -> bool:
+    """法令ID・法令履歴IDの形式かどうか"""
+    return bool(_IDENTIFIER_PATTERN.match(value))
+
+
+def is_law_number(value: str) -> bool:
+    """法令番号の形式かどうか"""
+    return bool(_LAW_NUMBER_PATTERN.match(value.strip()))
+
+
+def normalize_name(value: str) -> str:
+    """表記ゆれを吸収するため全角半角・空白・カタカナを正規化する"""
+    value = unicodedata.normalize("NFKC", value)
+    value = "".join(value.split())
+    return value.translate(_KATAKANA_TO_HIRAGANA)
+
+
+class LawCandidate:
+    """解決候補の法令"""
+
+    __slots__ = ("law_id", "law_title", "law_num", "current", "score")
+
+    def __init__(
+        self, law_id: str, law_title: str, law_num: str, current: bool,
+        score: float = 0.0,
+    ):
+        self.law_id = law_id
+        self.law_title = law_title
+        self.law_num = law_num
+        self.current = current
+        self.score = score
+
+
+class LawResolver:
+    """法令一覧のスナップショットから構築した名前索引で法令IDを解決する
+
+    法令名・略称（abbrev）・読み（law_title_kana）・法令番号を正規化して
+    ソート済み配列に格納し、二分探索で完全一致・前方一致を引く。
+    一意に決まらない場合は類似度順の候補を返す。
+    構築後は変更せず、更新時は build で新しい索引を作って差し替える
+    （参照中の索引が構築途中の状態にならないようにする）。
+    """
+
+    def __init__(self):
+        self.loaded_at: Optional[float] = None
+        self._laws: List[LawCandidate] = []
+        self._names: List[str] = []
+        self._targets: List[int] = []
+        # 類似検索の対象（法令名と略称のみ）
+        self._titles: Dict[str, List[int]] = {}
+        self._title_names: List[str] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @classmethod
+    def build(cls, snapshot: "CatalogSnapshot") -> "LawResolver":
+        """法令一覧のスナップショットから索引を構築する"""
+        entries: List[LawCandidate] = []
+        pairs: List[Tuple[str, int]] = []
+        titles: Dict[str, List[int]] = {}
+        strings = snapshot.strings
+
+        for index, law_id in enumerate(strings["law_id"]):
+            title = strings["law_title"][index]
+            law_num = strings["law_num"][index]
+            entries.append(LawCandidate(
+                law_id, title, law_num, snapshot.is_current(index)
+            ))
+
+            abbrevs = [a for a in strings["abbrev"][index].split(",") if a]
+            for name in [title, *abbrevs]:
+                if name:
+                    titles.setdefault(normalize_name(name), []).append(index)
+            for name in [
+                title, *abbrevs, strings["law_title_kana"][index], law_num,
+            ]:
+                if name:
+                    pairs.append((normalize_name(name), index))
+
+        pairs.sort()
+        resolver = cls()
+        resolver._laws = entries
+        resolver._names = [name for name, _ in pairs]
+        resolver._targets = [index for _, index in pairs]
+        resolver._titles = titles
+        resolver._title_names = list(titles)
+        resolver.loaded_at = time.monotonic()
+        return resolver
+
+    def resolve(self, name: str) -> Tuple[Optional[str], List[LawCandidate]]:
+        """名前から法令IDを解決する
+
+        一意に決まれば (法令ID, [該当法令]) を、決まらなければ
+        (None, 類似度順の候補) を返す。
+        """
+        key = normalize_name(name)
+        exact = self._lookup(key)
+        if exact:
+            # 同名の法令が複数ある場合は現行法令を優先する
+            current = [law for law in exact if law.current]
+            matches = current or exact
+            if len(matches) == 1:
+                law = matches[0]
+                return law.law_id, [LawCandidate(
+                    law.law_id, law.law_title, law.law_num, law.current, 1.0
+                )]
+        return None, self.suggest(key)
+
+    def suggest(self, key: str) -> List[LawCandidate]:
+        """完全一致・前方一致・類似度で順位付けした候補を返す"""
+        scores: Dict[int, float] = {}
+
+        def add(index: int, score: float) -> None:
+            if score > scores.get(index, 0.0):
+                scores[index] = score
+
+        for index in self._lookup_indices(key):
+            add(index, 1.0)
+        for name, index in self._prefix(key, MAX_CANDIDATES * 4):
+            add(index, 0.9 * len(key) / len(name))
+        for name in difflib.get_close_matches(
+            key, self._title_names, n=MAX_CANDIDATES, cutoff=0.5
+        ):
+            ratio = difflib.SequenceMatcher(None, key, name).ratio()
+            for index in self._titles[name]:
+                add(index, ratio * 0.9)
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (item[1], self._laws[item[0]].current),
+            reverse=True,
+        )
+        candidates = []
+        for index, score in ranked[:MAX_CANDIDATES]:
+            law = self._laws[index]
+            candidates.append(LawCandidate(
+                law.law_id, law.law_title, law.law_num, law.current,
+                round(score, 3),
+            ))
+        return candidates
+
+    def _lookup(self, key: str) -> List[LawCandidate]:
+        return [self._laws[index] for index in self._lookup_indices(key)]
+
+    def _lookup_indices(self, key: str) -> List[int]:
+        start = bisect.bisect_left(self._names, key)
+        indices: List[int] = []
+        while start < len(self._names) and self._names[start] == key:
+            if self._targets[start] not in indices:
+                indices.append(self._targets[start])
+            start += 1
+        return indices
+
+    def _prefix(self, key: str, limit: int) -> List[Tuple[str, int]]:
+        start = bisect.bisect_left(self._names, key)
+        results: List[Tuple[str, int]] = []
+        while (
+            start < len(self._names)
+            and len(results) < limit
+            and self._names[start].startswith(key)
+        ):
+            results.append((self._names[start], self._targets[start]))
+            start += 1
+        return results
@@ -0,0 +1,241 @@
+# XMLレスポンスの逐次解析（フィールド抽出・テキスト変換）
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Tuple
+
+
+# 配列を表す要素（子要素は配列の各要素としてパスに含めない）
+XML_LIST_CONTAINERS = {
+    "laws", "items", "revisions", "attached_files", "sentences"
+}
+
+# 法令本文のうち、単独の行として出力する見出し要素
+HEADING_TAGS = {
+    "LawNum", "LawTitle", "PartTitle", "ChapterTitle", "SectionTitle",
+    "SubsectionTitle", "DivisionTitle", "ArticleCaption",
+    "SupplProvisionLabel", "AppdxTableTitle", "TableStructTitle",
+}
+# 続く本文の行頭に付ける番号・見出し要素
+PREFIX_TAGS = {"ArticleTitle", "ParagraphNum", "ItemTitle"} | {
+    f"Subitem{i}Title" for i in range(1, 11)
+}
+# 本文として1行にまとめる要素
+SENTENCE_TAGS = {"ParagraphSentence", "ItemSentence", "TableColumn"} | {
+    f"Subitem{i}Sentence" for i in range(1, 11)
+}
+TEXT_TAGS = HEADING_TAGS | PREFIX_TAGS | SENTENCE_TAGS
+# 条の選択時に保持する本文の構造要素
+BODY_CONTAINERS = {
+    "Law", "LawBody", "MainProvision", "Part", "Chapter", "Section",
+    "Subsection", "Division",
+}
+
+_KEEP_ALL = "all"
+_KEEP_PARTIAL = "partial"
+_DROP = "drop"
+
+
+class LawTextWriter:
+    """法令本文の要素を条・項・号ごとの行にまとめる"""
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self._pending: List[str] = []
+
+    def add(self, tag: str, text: str) -> None:
+        """TEXT_TAGS に含まれる要素のテキストを追加する"""
+        text = text.strip()
+        if tag in PREFIX_TAGS:
+            if text:
+                self._pending.append(text)
+        elif tag in SENTENCE_TAGS:
+            line = " ".join(self._pending + ([text] if text else []))
+            self._pending = []
+            if line:
+                self._lines.append(line)
+        elif text:
+            self.add_line(text)
+
+    def add_line(self, line: str) -> None:
+        """1行をそのまま追加する"""
+        self._flush_pending()
+        self._lines.append(line)
+
+    def getvalue(self) -> str:
+        """組み立てたテキストを返す"""
+        self._flush_pending()
+        return "\n".join(self._lines)
+
+    def drain(self) -> str:
+        """確定した行を改行付きで取り出して空にする（逐次出力用）"""
+        if not self._lines:
+            return ""
+        text = "\n".join(self._lines) + "\n"
+        self._lines = []
+        return text
+
+    def _flush_pending(self) -> None:
+        if self._pending:
+            self._lines.append(" ".join(self._pending))
+            self._pending = []
+
+
+class XmlProjector:
+    """XMLPullParserでレスポンスを逐次解析し、必要な要素のみを残す
+
+    render="xml" の場合は抽出後のXML文字列を、render="text" の場合は
+    法令本文を条・項・号ごとの行に変換したコンパクトなテキストを返す。
+    不要な要素は終了タグの時点で破棄するため、DOM全体は保持しない。
+    """
+
+    def __init__(
+        self,
+        fields: Optional[List[str]] = None,
+        render: str = "xml",
+        article: Optional[str] = None,
+    ):
+        self.fields = [tuple(field.split(".")) for field in fields or []]
+        self.render = render
+        # 指定時は本則の該当条のみを本文として残す
+        self.article = article
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        # (要素, パス, 保持モード, 選択中の条の内側かどうか)
+        self._stack: List[Tuple[ET.Element, Tuple[str, ...], str, bool]] = []
+        self._root: Optional[ET.Element] = None
+        # テキスト化中の要素の深さ（Noneの場合は対象外）
+        self._capture_depth: Optional[int] = None
+        self._writer = LawTextWriter()
+        # 本文を出力対象としたか、指定された条が見つかったか
+        self._body_kept = False
+        self._article_found = False
+
+    def feed(self, chunk: bytes) -> None:
+        """受信したチャンクを解析する"""
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self) -> str:
+        """解析を終了し、結果を返す"""
+        self._parser.close()
+        self._drain()
+        if self.render == "text":
+            return self._writer.getvalue()
+        if self._root is None:
+            return ""
+        return ET.tostring(self._root, encoding="unicode")
+
+    @property
+    def article_missing(self) -> bool:
+        """本文を出力対象としたのに、指定された条が本則になかったかどうか"""
+        return (
+            self.article is not None
+            and self._body_kept
+            and not self._article_found
+        )
+
+    def _drain(self) -> None:
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._start(elem)
+            else:
+                self._end(elem)
+
+    def _start(self, elem: ET.Element) -> None:
+        if self._root is None:
+            self._root = elem
+            mode = _KEEP_PARTIAL if self.fields else _KEEP_ALL
+            self._stack.append((elem, (), mode, False))
+            return
+
+        parent, parent_path, parent_mode, in_article = self._stack[-1]
+        in_body = bool(parent_path) and parent_path[0] == "law_full_text"
+        if (
+            not in_body
+            and parent_path
+            and parent_path[-1] in XML_LIST_CONTAINERS
+            and parent.tag == parent_path[-1]
+        ):
+            # 配列の各要素はJSONと同様にパスへ含めない
+            path = parent_path
+        else:
+            path = parent_path + (elem.tag,)
+
+        if parent_mode == _KEEP_ALL:
+            mode = _KEEP_ALL
+        else:
+            mode = self._match(path)
+        if path == ("law_full_text",) and mode != _DROP:
+            self._body_kept = True
+
+        if (
+            self.article is not None
+            and in_body
+            and not in_article
+            and mode != _DROP
+        ):
+            if (
+                elem.tag == "Article"
+                and elem.get("Num") == self.article
+                and "MainProvision" in path
+            ):
+                in_article = True
+                self._article_found = True
+            elif elem.tag not in BODY_CONTAINERS:
+                mode = _DROP
+        self._stack.append((elem, path, mode, in_article))
+
+        if (
+            self.render == "text"
+            and mode != _DROP
+            and self._capture_depth is None
+            and elem.tag in TEXT_TAGS
+        ):
+            self._capture_depth = len(self._stack)
+
+    def _match(self, path: Tuple[str, ...]) -> str:
+        """要素のパスとフィールド指定を照合する"""
+        partial = False
+        for field in self.fields:
+            if path[: len(field)] == field:
+                return _KEEP_ALL
+            if field[: len(path)] == path:
+                partial = True
+        return _KEEP_PARTIAL if partial else _DROP
+
+    def _end(self, elem: ET.Element) -> None:
+        depth = len(self._stack)
+        _, path, mode, _ = self._stack.pop()
+        parent = self._stack[-1][0] if self._stack else None
+
+        if mode == _DROP:
+            _detach(parent, elem)
+            return
+        if self.render != "text":
+            return
+
+        if self._capture_depth is not None and depth > self._capture_depth:
+            # テキスト化中の要素の子孫はルビの読みのみ除去して保持する
+            if elem.tag == "Rt":
+                elem.text = None
+            return
+
+        if self._capture_depth == depth:
+            self._capture_depth = None
+            self._writer.add(elem.tag, "".join(elem.itertext()))
+        elif len(elem) == 0 and elem.text and elem.text.strip():
+            if not (path and path[0] == "law_full_text"):
+                self._writer.add_line(f"{'.'.join(path)}: {elem.text.strip()}")
+        _detach(parent, elem)
+
+
+def _detach(parent: Optional[ET.Element], elem: ET.Element) -> None:
+    """終了した要素を親から取り除く
+
+    feed() はチャンク全体を解析してからイベントを返すため、後続の兄弟要素が
+    既に親に追加されていることがある。末尾から探して該当要素のみを除く。
+    """
+    if parent is None:
+        return
+    for index in range(len(parent) - 1, -1, -1):
+        if parent[index] is elem:
+            del parent[index]
+            return
@@ -0,0 +1,37 @@
+import os
+
+from egov_mcp.attachments import AttachmentStore
+
+REVISION_ID = "411AC0000000127_19990813_000000000000000"
+
+
+def test_lookup_finds_files_saved_by_another_process(tmp_path):
+    AttachmentStore(str(tmp_path)).save(
+        REVISION_ID, "./pict/H11HO127-001.jpg", "2024-11-23T01:05:36+09:00",
+        "image/jpeg", b"jpeg",
+    )
+    # 新しいプロセスに相当する（メモリ上の情報を持たない）ストア
+    stored = AttachmentStore(str(tmp_path)).lookup(
+        REVISION_ID, "./pict/H11HO127-001.jpg"
+    )
+    assert stored is not None
+    assert stored.content_type == "image/jpeg"
+    assert stored.read() == b"jpeg"
+
+
+def test_new_revision_replaces_old_file(tmp_path):
+    store = AttachmentStore(str(tmp_path))
+    old = store.save(REVISION_ID, "./a.pdf", "2024-01-01", "application/pdf", b"old")
+    new = store.save(REVISION_ID, "./a.pdf", "2024-02-01", "application/pdf", b"new")
+    assert not os.path.exists(old.path)
+    stored = AttachmentStore(str(tmp_path)).lookup(REVISION_ID, "./a.pdf")
+    assert stored.path == new.path
+
+
+def test_total_size_is_bounded(tmp_path):
+    store = AttachmentStore(str(tmp_path), max_bytes=10)
+    first = store.save(REVISION_ID, "./1.pdf", "u", "application/pdf", b"x" * 6)
+    os.utime(first.path, (0, 0))
+    second = store.save(REVISION_ID, "./2.pdf", "u", "application/pdf", b"y" * 6)
+    assert store.lookup(REVISION_ID, "./1.pdf") is None
+    assert store.lookup(REVISION_ID, "./2.pdf").path == second.path
@@ -0,0 +1,37 @@
+import asyncio
+
+from egov_mcp.cache import SingleFlight
+
+
+async def slow_build(done):
+    await asyncio.sleep(0.05)
+    done.append(True)
+    return "built"
+
+
+def run_with_timeout(flight, done, **kwargs):
+    async def scenario():
+        try:
+            await asyncio.wait_for(
+                flight.run("catalog", lambda: slow_build(done), **kwargs), 0.01
+            )
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+
+
+def test_last_waiter_leaving_cancels_work():
+    flight, done = SingleFlight(), []
+    run_with_timeout(flight, done)
+    assert done == []
+    assert flight.cancelled == 1
+
+
+def test_detached_work_survives_caller_timeout():
+    flight, done = SingleFlight(), []
+    run_with_timeout(flight, done, detach=True)
+    assert done == [True]
+    assert flight.cancelled == 0
+    assert "catalog" not in flight
@@ -0,0 +1,132 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+
+from egov_mcp.catalog import CatalogSnapshot
+
+
+def law(law_id, law_type="Act", category="", promulgation_date="",
+        law_num_year=None, updated="", title=""):
+    return {
+        "law_info": {
+            "law_id": law_id,
+            "law_type": law_type,
+            "promulgation_date": promulgation_date,
+            "law_num_year": law_num_year,
+        },
+        "revision_info": {
+            "law_title": title or law_id,
+            "category": category,
+            "updated": updated,
+            "current_revision_status": "CurrentEnforced",
+        },
+    }
+
+
+LAWS = [
+    law("A1", "Act", "文化", "1999-08-13", 11, "2024-01-01T00:00:00+09:00"),
+    law("A2", "Act", "税制", "2000-03-31", 12, "2024-02-01T00:00:00+09:00"),
+    law("C1", "CabinetOrder", "税制", "2000-04-01", 12,
+        "2024-03-01T00:00:00+09:00"),
+    law("M1", "MinisterialOrdinance", "", "", None, ""),
+]
+
+
+def ids(snapshot, indices):
+    return [snapshot.strings["law_id"][i] for i in indices]
+
+
+def test_filters_on_category_and_int_columns():
+    snapshot = CatalogSnapshot.build(LAWS)
+    assert ids(snapshot, snapshot.select({"law_type": "Act"})) == ["A1", "A2"]
+    assert ids(snapshot, snapshot.select(
+        {"law_type": ["Act", "CabinetOrder"], "category": "税制"}
+    )) == ["A2", "C1"]
+    assert ids(snapshot, snapshot.select({"law_num_year": 12})) == ["A2", "C1"]
+    assert ids(snapshot, snapshot.select({"law_num_year": "11"})) == ["A1"]
+    assert snapshot.select({"category": "存在しない分類"}) == []
+    with pytest.raises(ValueError):
+        snapshot.select({"law_num_year": "平成"})
+    with pytest.raises(ValueError):
+        snapshot.select({"law_title": "A1"})
+
+
+def test_date_range_is_inclusive():
+    snapshot = CatalogSnapshot.build(LAWS)
+    selected = snapshot.select(
+        date_field="promulgation_date",
+        date_from="2000-03-31", date_to="2000-04-01",
+    )
+    assert ids(snapshot, selected) == ["A2", "C1"]
+    # 値のない行は期間指定に一致しない
+    assert ids(snapshot, snapshot.select(
+        date_field="promulgation_date", date_to="1999-08-13"
+    )) == ["A1"]
+    with pytest.raises(ValueError):
+        snapshot.select(date_field="promulgation_date", date_from="2000/01/01")
+    with pytest.raises(ValueError):
+        snapshot.select(date_field="law_type", date_from="2000-01-01")
+
+
+def test_within_days_selects_from_today(monkeypatch):
+    main = pytest.importorskip("egov_mcp.main")
+    today = datetime.date.today()
+    snapshot = CatalogSnapshot.build([
+        law("PAST", promulgation_date=(today - datetime.timedelta(days=3)).isoformat()),
+        law("TODAY", promulgation_date=today.isoformat()),
+        law("SOON", promulgation_date=(today + datetime.timedelta(days=7)).isoformat()),
+        law("LATER", promulgation_date=(today + datetime.timedelta(days=8)).isoformat()),
+    ])
+    monkeypatch.setattr(main, "catalog", snapshot)
+
+    def stats(within_days):
+        contents = asyncio.run(main.law_stats({
+            "date_field": "promulgation_date", "within_days": within_days,
+        }))
+        return [row["law_id"] for row in json.loads(contents[0].text)["laws"]]
+
+    assert stats(7) == ["TODAY", "SOON"]
+    # 負の日数は過去の期間
+    assert stats(-3) == ["PAST", "TODAY"]
+
+
+def test_merge_replaces_updated_law():
+    snapshot = CatalogSnapshot.build(LAWS)
+    merged = snapshot.merge([
+        law("A2", "Act", "金融", "2000-03-31", 12, "2024-05-01T00:00:00+09:00",
+            title="改正後"),
+        law("N1", "Act", "文化", "2024-04-01", 6, "2024-04-01T00:00:00+09:00"),
+    ])
+    assert len(merged) == 5
+    assert sorted(merged.strings["law_id"]) == ["A1", "A2", "C1", "M1", "N1"]
+    row = merged.row(merged.strings["law_id"].index("A2"))
+    assert row["law_title"] == "改正後"
+    assert row["category"] == "金融"
+    assert ids(merged, merged.select({"category": "税制"})) == ["C1"]
+    assert merged.updated_through() == "2024-05-01"
+    # 元のスナップショットは変更しない
+    assert len(snapshot) == 4
+    assert snapshot.updated_through() == "2024-03-01"
+
+
+def test_group_by_sorts_empty_values_last():
+    snapshot = CatalogSnapshot.build(LAWS + [
+        law("M2", "MinisterialOrdinance", "", "", None, ""),
+    ])
+    indices = snapshot.select()
+    assert snapshot.group_count(indices, ["category"]) == [
+        (("",), 2), (("税制",), 2), (("文化",), 1),
+    ]
+    # 値なしの整数列（None）は件数が同じ値の後ろに並ぶ
+    assert snapshot.group_count(indices, ["law_num_year"]) == [
+        ((12,), 2), ((None,), 2), ((11,), 1),
+    ]
+    assert snapshot.group_count(indices, ["promulgation_date"]) == [
+        (("",), 2), (("2000",), 2), (("1999",), 1),
+    ]
+    assert snapshot.group_count(indices, ["law_type", "law_num_year"]) == [
+        (("MinisterialOrdinance", None), 2), (("Act", 11), 1),
+        (("Act", 12), 1), (("CabinetOrder", 12), 1),
+    ]
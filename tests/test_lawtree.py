@@ -0,0 +1,40 @@
+import json
+import os
+
+from egov_mcp.lawtree import CompactTree, LawDocument, LawTreeStore, parse_law_document
+
+SAMPLE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "APIレスポンス", "法令本文取得API.md",
+)
+
+
+def load_sample() -> bytes:
+    with open(SAMPLE, "rb") as f:
+        return f.read()
+
+
+def test_round_trip_matches_api_payload(tmp_path):
+    content = load_sample()
+    meta, encoded = parse_law_document(content)
+    store = LawTreeStore(str(tmp_path))
+    try:
+        document = LawDocument(meta, store.save("sample", encoded))
+        assert document.to_dict() == json.loads(content)
+    finally:
+        store.close()
+
+
+def test_round_trip_keeps_missing_and_empty_keys():
+    tree = {
+        "tag": "Law",
+        "attr": {},
+        "children": [
+            {"tag": "LawNum", "attr": "", "children": ["第一号"]},
+            {"tag": "Paragraph", "attr": {"Num": "1"}},
+            {"tag": "Remarks"},
+            {"tag": "Item", "children": []},
+        ],
+    }
+    _, encoded = parse_law_document(json.dumps({"law_full_text": tree}))
+    assert CompactTree(encoded).to_obj() == tree
@@ -0,0 +1,154 @@
+import json
+import re
+import time
+
+import pytest
+
+from egov_mcp.lawtree import CompactTree, LawDocument, parse_law_document
+from egov_mcp.pagination import PageStore, decode_cursor, find_cut, iter_chunks
+
+KANJI = "〇一二三四五六七八九"
+
+
+def article(num: int) -> dict:
+    return {
+        "tag": "Article",
+        "attr": {"Num": str(num)},
+        "children": [
+            {
+                "tag": "ArticleTitle", "attr": "",
+                "children": [f"第{KANJI[num % 10]}条"],
+            },
+            *[
+                {
+                    "tag": "Paragraph",
+                    "attr": {"Num": str(p)},
+                    "children": [{
+                        "tag": "ParagraphSentence",
+                        "attr": "",
+                        "children": [{
+                            "tag": "Sentence", "attr": "",
+                            "children": ["この法律の規定は、適用する。" * 3],
+                        }],
+                    }],
+                }
+                for p in range(1, 4)
+            ],
+        ],
+    }
+
+
+LAW = {
+    "law_info": {"law_id": "411AC0000000127"},
+    "law_full_text": {
+        "tag": "Law",
+        "attr": "",
+        "children": [{
+            "tag": "LawBody",
+            "attr": "",
+            "children": [{
+                "tag": "MainProvision",
+                "attr": "",
+                "children": [article(n) for n in range(1, 10)],
+            }],
+        }],
+    },
+}
+JSON_TEXT = json.dumps(LAW, ensure_ascii=False, indent=2)
+_, _ENCODED = parse_law_document(JSON_TEXT)
+TEXT = LawDocument({}, CompactTree(_ENCODED)).render_text({})
+
+JSON_ARTICLE = re.compile(r'\n[ \t]*\{\n[ \t]*"tag": "Article"')
+TEXT_ARTICLE = re.compile(r"\n(?=第[%s]+条)" % KANJI)
+
+
+def pages(text: str, max_chars: int):
+    offset = 0
+    while offset < len(text):
+        cut = find_cut(text, offset, max_chars)
+        yield offset, cut
+        offset = cut
+
+
+@pytest.mark.parametrize("text,boundary", [
+    (JSON_TEXT, JSON_ARTICLE), (TEXT, TEXT_ARTICLE),
+])
+def test_pages_cut_at_articles_and_reassemble(text, boundary):
+    max_chars = len(text) // 4
+    spans = list(pages(text, max_chars))
+    assert len(spans) > 1
+    assert "".join(text[start:end] for start, end in spans) == text
+    for start, end in spans[:-1]:
+        assert end - start <= max_chars
+        assert boundary.match(text, end)
+
+
+@pytest.mark.parametrize("text,boundary", [
+    (JSON_TEXT, JSON_ARTICLE), (TEXT, TEXT_ARTICLE),
+])
+def test_iter_chunks_cut_at_articles_and_reassemble(text, boundary):
+    # iterencode のような細切れの入力を与える
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+    chunks = list(iter_chunks(pieces, len(text) // 4))
+    assert len(chunks) > 1
+    assert "".join(chunks) == text
+    position = 0
+    for chunk in chunks[:-1]:
+        position += len(chunk)
+        assert boundary.match(text, position)
+
+
+def test_find_cut_falls_back_to_paragraph_and_sentence():
+    # 条の区切りが範囲内にない場合は項、それもなければ文末で切る
+    start = JSON_TEXT.index('"tag": "Paragraph"')
+    cut = find_cut(JSON_TEXT, start, 1200)
+    assert re.match(r'\n[ \t]*\{\n[ \t]*"tag": "Paragraph"', JSON_TEXT[cut:])
+
+    sentence = "この法律の規定は、適用する。" * 20
+    cut = find_cut(sentence, 0, 100)
+    assert sentence[:cut].endswith("。")
+    assert cut <= 100
+
+
+def test_page_store_evicts_least_recently_used():
+    store = PageStore(max_chars=100)
+    first = store.put("a" * 60)
+    second = store.put("b" * 30)
+    assert store.get(first) is not None
+    third = store.put("c" * 30)
+    assert store.get(second) is None
+    assert store.get(first) == "a" * 60
+    assert store.get(third) == "c" * 30
+
+
+def test_page_store_makes_room_or_refuses_oversized_text():
+    store = PageStore(max_chars=100)
+    store.put("a" * 60)
+    key = store.put("b" * 90)
+    assert store.get(key) == "b" * 90
+    assert store.put("c" * 101) is None
+    assert store.get(key) == "b" * 90
+
+
+def test_page_store_expires_entries():
+    store = PageStore(max_chars=100, ttl=0.05)
+    key = store.put("a" * 10)
+    assert store.get(key) == "a" * 10
+    time.sleep(0.1)
+    assert store.get(key) is None
+
+
+def test_paginate_contents_without_room_has_no_cursor(monkeypatch):
+    main = pytest.importorskip("egov_mcp.main")
+    monkeypatch.setattr(main, "page_store", PageStore(max_chars=len(TEXT) - 1))
+    contents = [main.TextContent(type="text", text=TEXT)]
+    page = main.paginate_contents(contents, len(TEXT) // 4)[0].text
+    assert "cursor=" not in page
+    assert "続きは取得できません" in page
+
+    monkeypatch.setattr(main, "page_store", PageStore(max_chars=len(TEXT)))
+    page = main.paginate_contents(contents, len(TEXT) // 4)[0].text
+    cursor = re.search(r'cursor="([^"]+)"', page).group(1)
+    key, offset = decode_cursor(cursor)
+    resumed = main.resume_page(cursor, len(TEXT))[0].text
+    assert resumed.startswith(TEXT[offset:offset + 100])
@@ -0,0 +1,97 @@
+from egov_mcp.catalog import CatalogSnapshot
+from egov_mcp.resolver import (
+    LawResolver, is_law_identifier, is_law_number, normalize_name,
+)
+
+
+def law(law_id, title, kana="", abbrev="", law_num="", status="CurrentEnforced"):
+    return {
+        "law_info": {"law_id": law_id, "law_num": law_num},
+        "revision_info": {
+            "law_title": title,
+            "law_title_kana": kana,
+            "abbrev": abbrev,
+            "current_revision_status": status,
+        },
+    }
+
+
+LAWS = [
+    law(
+        "411AC0000000127", "国旗及び国歌に関する法律",
+        kana="こっきおよびこっかにかんするほうりつ",
+        abbrev="国旗国歌法,日の丸君が代法,国旗・国歌法",
+        law_num="平成十一年法律第百二十七号",
+    ),
+    law("329AC0000000051", "ガス事業法", kana="がすじぎょうほう"),
+    law("413AC0000000065", "ＰＣＢ廃棄物の適正な処理の推進に関する特別措置法"),
+    law("327AC0000000180", "道路法"),
+    law("335AC0000000105", "道路交通法"),
+    # 同名の法令（廃止済みのものと現行のもの）
+    law("322AC0000000001", "同名法", status="Repeal"),
+    law("422AC0000000001", "同名法"),
+]
+
+
+def build() -> LawResolver:
+    return LawResolver.build(CatalogSnapshot.build(LAWS))
+
+
+def test_resolves_exact_title():
+    law_id, candidates = build().resolve("国旗及び国歌に関する法律")
+    assert law_id == "411AC0000000127"
+    assert candidates[0].score == 1.0
+
+
+def test_resolves_each_abbreviation():
+    resolver = build()
+    for name in ("国旗国歌法", "日の丸君が代法", "国旗・国歌法"):
+        assert resolver.resolve(name)[0] == "411AC0000000127"
+
+
+def test_normalizes_katakana_width_and_spaces():
+    resolver = build()
+    assert resolver.resolve("がす事業法")[0] == "329AC0000000051"
+    assert resolver.resolve("ｶﾞｽ 事業法")[0] == "329AC0000000051"
+    assert resolver.resolve(
+        "PCB廃棄物の適正な処理の推進に関する特別措置法"
+    )[0] == "413AC0000000065"
+    assert normalize_name("ガス　事業法") == "がす事業法"
+
+
+def test_prefers_current_law_with_same_name():
+    law_id, candidates = build().resolve("同名法")
+    assert law_id == "422AC0000000001"
+    assert candidates[0].current
+
+
+def test_ambiguous_input_returns_ranked_candidates():
+    law_id, candidates = build().resolve("道路")
+    assert law_id is None
+    assert [c.law_id for c in candidates[:2]] == [
+        "327AC0000000180", "335AC0000000105",
+    ]
+    scores = [c.score for c in candidates]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_suggest_ranks_similar_titles():
+    candidates = build().suggest(normalize_name("国旗及び国家に関する法律"))
+    assert candidates[0].law_id == "411AC0000000127"
+    assert 0 < candidates[0].score < 1
+
+
+def test_build_returns_new_index():
+    empty = LawResolver()
+    resolver = LawResolver.build(CatalogSnapshot.build(LAWS))
+    assert resolver is not empty
+    assert resolver.loaded and not empty.loaded
+    assert empty.resolve("道路法") == (None, [])
+
+
+def test_identifier_and_law_number_shapes():
+    assert is_law_identifier("411AC0000000127_19990813_000000000000000")
+    assert not is_law_identifier("国旗国歌法")
+    assert is_law_number("平成十一年法律第百二十七号")
+    assert is_law_number("令和元年内閣府令第一号")
+    assert not is_law_number("国旗及び国歌に関する法律")
@@ -0,0 +1,131 @@
+from typing import List
+
+import pytest
+
+from egov_mcp.xml_stream import XmlProjector
+
+# 法令本文取得APIのXMLレスポンス（APIレスポンス/法令本文取得API.md を元に条を追加）
+LAW_DATA_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<law_data_response>
+  <attached_files_info>
+    <image_data></image_data>
+    <attached_files>
+      <attached_file>
+        <law_revision_id>411AC0000000127_19990813_000000000000000</law_revision_id>
+        <src>./pict/H11HO127-001.jpg</src>
+        <updated>2024-11-23T01:05:36+09:00</updated>
+      </attached_file>
+    </attached_files>
+  </attached_files_info>
+  <law_info>
+    <law_type>Act</law_type>
+    <law_id>411AC0000000127</law_id>
+    <law_num>平成十一年法律第百二十七号</law_num>
+    <promulgation_date>1999-08-13</promulgation_date>
+  </law_info>
+  <revision_info>
+    <law_revision_id>411AC0000000127_19990813_000000000000000</law_revision_id>
+    <law_title>国旗及び国歌に関する法律</law_title>
+    <law_title_kana>こっきおよびこっかにかんするほうりつ</law_title_kana>
+    <category>文化</category>
+  </revision_info>
+  <law_full_text>
+    <Law Era="Heisei" Lang="ja" LawType="Act" Num="127" Year="11">
+      <LawNum>平成十一年法律第百二十七号</LawNum>
+      <LawBody>
+        <LawTitle>国旗及び国歌に関する法律</LawTitle>
+        <MainProvision>
+          <Article Num="1">
+            <ArticleCaption>（国旗）</ArticleCaption>
+            <ArticleTitle>第一条</ArticleTitle>
+            <Paragraph Num="1">
+              <ParagraphNum/>
+              <ParagraphSentence><Sentence>国旗は、日章旗とする。</Sentence></ParagraphSentence>
+            </Paragraph>
+          </Article>
+          <Article Num="2">
+            <ArticleCaption>（国歌）</ArticleCaption>
+            <ArticleTitle>第二条</ArticleTitle>
+            <Paragraph Num="1">
+              <ParagraphNum/>
+              <ParagraphSentence><Sentence>国歌は、君が代とする。</Sentence></ParagraphSentence>
+            </Paragraph>
+          </Article>
+        </MainProvision>
+        <SupplProvision>
+          <SupplProvisionLabel>附　則</SupplProvisionLabel>
+        </SupplProvision>
+      </LawBody>
+    </Law>
+  </law_full_text>
+</law_data_response>
+""".encode("utf-8")
+
+
+def project(chunk_size: int, fields: List[str], **kwargs) -> str:
+    projector = XmlProjector(fields, **kwargs)
+    for start in range(0, len(LAW_DATA_XML), chunk_size):
+        projector.feed(LAW_DATA_XML[start:start + chunk_size])
+    return projector.close()
+
+
+@pytest.mark.parametrize("render", ["xml", "text"])
+@pytest.mark.parametrize("fields,article", [
+    ([
+        "law_info.law_type", "law_info.law_num",
+        "revision_info.law_title", "revision_info.law_title_kana",
+    ], None),
+    (["law_full_text"], "2"),
+    (["law_info.law_id", "law_full_text"], None),
+    ([], None),
+])
+def test_output_does_not_depend_on_chunk_size(fields, article, render):
+    whole = project(len(LAW_DATA_XML), fields, render=render, article=article)
+    for chunk_size in (1, 7, 64):
+        assert project(chunk_size, fields, render=render, article=article) == whole
+
+
+def test_fields_projection_fed_whole():
+    result = project(len(LAW_DATA_XML), [
+        "law_info.law_type", "law_info.law_num",
+        "revision_info.law_title", "revision_info.law_title_kana",
+    ])
+    assert "<law_type>Act</law_type>" in result
+    assert "<law_num>平成十一年法律第百二十七号</law_num>" in result
+    assert "<law_title>国旗及び国歌に関する法律</law_title>" in result
+    assert "<law_title_kana>" in result
+    assert "law_id" not in result
+    assert "attached_files_info" not in result
+
+
+def test_article_selection_fed_whole():
+    result = project(len(LAW_DATA_XML), ["law_full_text"], article="2")
+    assert '<Article Num="2">' in result
+    assert "国歌は、君が代とする。" in result
+    assert "国旗は、日章旗とする。" not in result
+    assert "SupplProvision" not in result
+
+    text = project(
+        len(LAW_DATA_XML), ["law_full_text"], render="text", article="2"
+    )
+    assert "第二条 国歌は、君が代とする。" in text
+    assert "第一条" not in text
+
+
+@pytest.mark.parametrize("render", ["xml", "text"])
+def test_missing_article_is_reported(render):
+    projector = XmlProjector(["law_full_text"], render=render, article="9")
+    projector.feed(LAW_DATA_XML)
+    projector.close()
+    assert projector.article_missing
+
+    projector = XmlProjector(["law_full_text"], render=render, article="2")
+    projector.feed(LAW_DATA_XML)
+    projector.close()
+    assert not projector.article_missing
+
+    # 本文を出力しない場合は条の指定を問わない
+    projector = XmlProjector(["law_info.law_id"], render=render, article="9")
+    projector.feed(LAW_DATA_XML)
+    projector.close()
+    assert not projector.article_missing